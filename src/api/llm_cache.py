@@ -0,0 +1,122 @@
+"""
+LLM响应缓存
+按提示词哈希精确匹配，避免对相同输入重复调用API
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+
+class LLMCache:
+    """基于SQLite的LLM响应缓存"""
+
+    def __init__(self, cache_dir: str, ttl: Optional[float] = None):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 缓存有效期（秒），None表示永不过期
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+        # 异步客户端在线程池中执行缓存读写（避免阻塞事件循环），
+        # 连接需跨线程共享，由锁串行化访问
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "llm_cache.sqlite3"),
+            check_same_thread=False
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        根据提示词生成缓存键
+
+        Args:
+            *parts: 参与哈希的文本（模型名、系统提示词、用户提示词等）
+
+        Returns:
+            十六进制哈希字符串
+        """
+        normalized = "\x00".join((part or "").strip() for part in parts)
+        return hashlib.blake2b(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的响应，未命中或已过期时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        response, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+
+        return response
+
+    def get_many(self, keys: Iterable[str]) -> List[Optional[str]]:
+        """
+        批量读取缓存
+
+        Args:
+            keys: 缓存键
+
+        Returns:
+            与 keys 一一对应的缓存响应，未命中或已过期时为None
+        """
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, response: str) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            response: 模型响应
+        """
+        self.set_many([(key, response)])
+
+    def set_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        批量写入缓存（一次提交）
+
+        Args:
+            items: (缓存键, 模型响应) 序列
+        """
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO responses (key, response, expires_at) VALUES (?, ?, ?)",
+                [(key, response, expires_at) for key, response in items]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -3,18 +3,37 @@ LLM API客户端
 用于段落分析、逻辑重构等任务
 """
 
+import re
 import json
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from http import HTTPStatus
+from typing import Dict, Iterator, List, Optional
+
+from .llm_cache import LLMCache
 
 try:
-    import dashscope
-    from dashscope import Generation
-    from http import HTTPStatus
+    import aiohttp
 except ImportError:
     pass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import json_repair
+except ImportError:
+    # 可选依赖：用于修复截断或格式不规范的JSON
+    json_repair = None
+
+
+# 通义千问文本生成REST接口
+DASHSCOPE_GENERATION_URL = (
+    "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
+)
+
 
 class BaseLLMClient(ABC):
     """LLM客户端基类"""
@@ -45,25 +64,349 @@ class BaseLLMClient(ABC):
         """
         pass
 
+    async def extract_topics_batch(self, texts: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        批量提取多段文本的主题
+
+        默认逐段调用 extract_topics，子类可覆盖为单次请求
+
+        Args:
+            texts: {段落ID: 文本内容}
+
+        Returns:
+            {段落ID: 主题列表}
+        """
+        results = await asyncio.gather(*[self.extract_topics(text) for text in texts.values()])
+        return dict(zip(texts.keys(), results))
+
+    async def summarize_segments(self, segments: List[Dict], max_tokens: int = 30) -> Dict[str, str]:
+        """
+        为每个段落生成简短摘要
+
+        默认直接截取段落开头，子类可覆盖为模型摘要
+
+        Args:
+            segments: 段落列表 [{"id": "seg_1", "text": "..."}]
+            max_tokens: 摘要最大长度
+
+        Returns:
+            {段落ID: 摘要}
+        """
+        return {seg['id']: seg['text'][:max_tokens] for seg in segments}
+
+    async def aclose(self):
+        """释放客户端持有的资源"""
+        pass
+
+
+# 可重试的HTTP状态码（限流与服务端临时错误）
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class _RetryableAPIError(RuntimeError):
+    """可重试的API错误"""
+    pass
+
+
+# 段落分析的系统提示词（固定前缀，便于服务端复用前缀缓存）
+_ANALYSIS_SYSTEM_PROMPT = """你是一个哲学文本分析专家，擅长分析论述的逻辑结构。
+请仔细分析给定的段落，识别它们之间的逻辑关系。
+
+请以JSON格式输出分析结果，包括：
+1. core_arguments: 核心论点列表（段落ID）
+2. supporting_points: 支撑论据列表（段落ID）
+3. logic_chains: 逻辑链路（每条链路包含相关段落ID和关系类型）
+4. paragraph_relations: 段落间的具体关系（source_id, target_id, relation_type, description）
+5. topic_tree: 主题树结构
+
+输出格式示例：
+{
+  "core_arguments": ["seg_1", "seg_5"],
+  "supporting_points": ["seg_2", "seg_3"],
+  "logic_chains": [
+    {
+      "chain_id": "chain_1",
+      "chain_type": "MAIN_ARGUMENT",
+      "segments": ["seg_1", "seg_2", "seg_3"],
+      "description": "关于XX的核心论述"
+    }
+  ],
+  "paragraph_relations": [
+    {
+      "source_id": "seg_1",
+      "target_id": "seg_2",
+      "relation_type": "CAUSALITY",
+      "description": "因果关系：A导致B"
+    }
+  ],
+  "topic_tree": {
+    "main_topic": "核心主题",
+    "subtopics": [...]
+  }
+}"""
+
+# 合并分组分析结果的系统提示词
+_REDUCE_SYSTEM_PROMPT = """你是一个哲学文本分析专家。
+以下是对同一文档的各部分分别分析得到的核心论点、逻辑链路和主题树。
+请合并跨部分延续的逻辑链路，并构建整个文档的主题树。
+
+请以JSON格式输出：
+{
+  "logic_chains": [
+    {
+      "chain_id": "chain_1",
+      "chain_type": "MAIN_ARGUMENT",
+      "segments": ["seg_1", "seg_2", "seg_3"],
+      "description": "关于XX的核心论述"
+    }
+  ],
+  "topic_tree": {
+    "main_topic": "核心主题",
+    "subtopics": [...]
+  }
+}"""
+
+# 段落摘要的系统提示词
+_SUMMARY_SYSTEM_PROMPT = """你是一个哲学文本分析专家。
+请为给定的每个段落写一句概括其论点的摘要，保留关键概念与逻辑标记词。
+
+请以JSON对象格式输出，键为段落ID，值为摘要，例如：
+{"seg_1": "摘要1", "seg_2": "摘要2"}"""
+
+# 段落分析中单个段落的格式
+_SEGMENT_TEMPLATE = "[段落{index}] ID: {id}\n时间: {timestamp}\n标记词: {markers}\n内容: {text}\n\n"
+
+# 匹配 ```json ... ``` 代码块中的JSON对象或数组
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(\{.*?\}|\[.*?\])\s*```", re.S)
+
+
+def _json_loads(data):
+    """解析JSON（优先使用orjson）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> str:
+    """序列化为JSON字符串（优先使用orjson，保留非ASCII字符）"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _iter_json_regions(text: str) -> Iterator[str]:
+    """
+    单次扫描依次定位各个顶层括号配平的JSON对象或数组
+
+    最后一个区域未配平（如输出被截断）时返回从起始括号到结尾的部分
+
+    Args:
+        text: 模型响应
+
+    Returns:
+        迭代候选JSON文本
+    """
+    start = None
+    depth = 0
+    in_string = False
+    escaped = False
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = start is not None
+        elif ch in '{[':
+            if start is None:
+                start = i
+            depth += 1
+        elif ch in '}]' and start is not None:
+            depth -= 1
+            if depth == 0:
+                yield text[start:i + 1]
+                start = None
+
+    if start is not None:
+        yield text[start:]
+
+
+def _iter_json_candidates(response: str) -> Iterator[str]:
+    """按优先级迭代候选JSON文本（先```json代码块，再各个括号区域）"""
+    for match in _JSON_FENCE.finditer(response):
+        yield match.group(1)
+    yield from _iter_json_regions(response)
+
+
+def _decode_json_payload(response: str, expected: type):
+    """
+    解析模型响应中第一个符合指定类型的JSON候选
+
+    模型可能在JSON前复述提示词中的 [段落1] 标签或输出其他括号内容，
+    某个候选无法解析或类型不符时继续尝试下一个；命中的候选只解析一次
+
+    Args:
+        response: 模型响应
+        expected: 期望的类型（dict、list或二者的元组）
+
+    Returns:
+        解析得到的对象，没有可用候选时返回None
+    """
+    for json_str in _iter_json_candidates(response):
+        try:
+            result = _json_loads(json_str)
+        except ValueError:
+            continue
+        if isinstance(result, expected):
+            return result
+    return None
+
+
+def _parse_json(response: str, expected: type = (dict, list)):
+    """
+    从模型响应中解析JSON（兼容```json代码块及前后多余文本）
+
+    Args:
+        response: 模型响应
+        expected: 期望的类型（dict、list或二者的元组）
+
+    Returns:
+        解析得到的对象或数组
+
+    Raises:
+        ValueError: 无法解析为期望的类型
+    """
+    result = _decode_json_payload(response, expected)
+    if result is not None:
+        return result
+
+    if json_repair is not None:
+        # 尝试修复截断或不规范的JSON
+        for json_str in _iter_json_candidates(response):
+            result = json_repair.loads(json_str)
+            if result and isinstance(result, expected):
+                return result
+
+    raise ValueError(f"无法解析JSON: {response[:100]}")
+
+
+def _chunk_segments(segments: List[Dict], k: int) -> List[List[Dict]]:
+    """将段落列表按每组k个切分"""
+    return [segments[i:i + k] for i in range(0, len(segments), k)]
+
 
 class QwenLLMClient(BaseLLMClient):
     """通义千问客户端"""
 
-    def __init__(self, api_key: str, model: str = "qwen-max"):
+    def __init__(self, api_key: str, model: str = "qwen-max",
+                 cache_dir: str = None, cache_ttl: float = None,
+                 base_url: str = DASHSCOPE_GENERATION_URL,
+                 max_chars_per_seg: int = 1000,
+                 analysis_chunk_size: int = 20,
+                 summary_min_chars: int = 200,
+                 max_connections: int = 64,
+                 max_retries: int = 3,
+                 retry_backoff: float = 0.3,
+                 connect_timeout: float = 10.0,
+                 read_timeout: float = 120.0):
         """
         初始化千问客户端
 
         Args:
             api_key: API密钥
             model: 模型名称
+            cache_dir: 响应缓存目录（为空则不缓存）
+            cache_ttl: 缓存有效期（秒）
+            base_url: 文本生成接口地址
+            max_chars_per_seg: 段落分析时每个段落最多提交的字符数
+            analysis_chunk_size: 段落分析时每次请求包含的最大段落数
+            summary_min_chars: 段落分析时超过该长度的段落以摘要代替原文（0表示不摘要）
+            max_connections: 连接池最大连接数
+            max_retries: 限流或服务端错误时的最大重试次数
+            retry_backoff: 重试退避基数（秒），第n次重试等待 retry_backoff * 2^n
+            connect_timeout: 建立连接超时（秒）
+            read_timeout: 两次读取之间的超时（秒）
         """
         self.api_key = api_key
         self.model = model
-        dashscope.api_key = api_key
+        self.base_url = base_url
+        self.max_chars_per_seg = max_chars_per_seg
+        self.analysis_chunk_size = analysis_chunk_size
+        self.summary_min_chars = summary_min_chars
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.cache = LLMCache(cache_dir, ttl=cache_ttl) if cache_dir else None
+        self._session = None
+        self._session_loop = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """
+        获取（必要时创建）绑定当前事件循环的HTTP会话
+
+        Raises:
+            RuntimeError: 会话仍在另一个事件循环中打开（需先在原事件循环中调用 aclose()）
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._session_loop is not loop:
+            # 旧会话的连接属于另一个事件循环，无法在此关闭；直接替换会泄漏连接池
+            raise RuntimeError("LLM客户端的HTTP会话属于另一个事件循环，请先在原事件循环中调用 aclose()")
+        if self._session is None or self._session.closed:
+            # 复用连接池中的keep-alive连接，避免每次请求重新进行TLS握手
+            self._session = aiohttp.ClientSession(
+                headers={'Authorization': f'Bearer {self.api_key}'},
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=self.max_connections
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.connect_timeout,
+                    sock_read=self.read_timeout
+                )
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def aclose(self):
+        """关闭HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    async def _call_api(self, prompt: str, system_prompt: str = None) -> str:
+        """
+        调用API（优先读取缓存）
 
-    def _call_api(self, prompt: str, system_prompt: str = None) -> str:
+        Args:
+            prompt: 用户提示词
+            system_prompt: 系统提示词
+
+        Returns:
+            模型响应
         """
-        调用API
+        if self.cache is None:
+            return await self._generate(prompt, system_prompt)
+
+        # SQLite读写在线程池中执行，不阻塞事件循环
+        loop = asyncio.get_running_loop()
+        key = LLMCache.make_key(self.model, system_prompt or "", prompt)
+        response = await loop.run_in_executor(None, self.cache.get, key)
+        if response is None:
+            response = await self._generate(prompt, system_prompt)
+            await loop.run_in_executor(None, self.cache.set, key, response)
+
+        return response
+
+    async def _generate(self, prompt: str, system_prompt: str = None) -> str:
+        """
+        请求模型生成
 
         Args:
             prompt: 用户提示词
@@ -77,93 +420,114 @@ class QwenLLMClient(BaseLLMClient):
             messages.append({'role': 'system', 'content': system_prompt})
         messages.append({'role': 'user', 'content': prompt})
 
-        response = Generation.call(
-            model=self.model,
-            messages=messages,
-            result_format='message'
-        )
+        body = {
+            'model': self.model,
+            'input': {'messages': messages},
+            'parameters': {'result_format': 'message', 'incremental_output': True}
+        }
 
-        if response.status_code == HTTPStatus.OK:
-            return response.output.choices[0].message.content
-        else:
-            raise RuntimeError(f"LLM API错误: {response}")
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._stream_generate(body)
+            except (_RetryableAPIError, aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def _stream_generate(self, body: Dict) -> str:
+        """
+        发送一次生成请求
+
+        Args:
+            body: 请求体
+
+        Returns:
+            模型响应
+        """
+        # 以SSE流式接收，逐块拼接增量输出
+        chunks = []
+        session = self._get_session()
+        async with session.post(self.base_url, json=body,
+                                headers={'X-DashScope-SSE': 'enable'}) as response:
+            if response.status in _RETRY_STATUSES:
+                raise _RetryableAPIError(f"LLM API错误: {await response.text()}")
+            if response.status != HTTPStatus.OK:
+                raise RuntimeError(f"LLM API错误: {await response.text()}")
+
+            async for line in response.content:
+                if not line.startswith(b'data:'):
+                    continue
+                data = _json_loads(line[5:])
+                if 'output' not in data:
+                    raise RuntimeError(f"LLM API错误: {data}")
+                chunks.append(data['output']['choices'][0]['message']['content'])
+
+        return "".join(chunks)
 
     async def analyze_paragraphs(self, segments: List[Dict]) -> Dict:
         """
         分析段落的逻辑关系
 
+        段落较多时分组并发分析，再合并各组结果
+
         Args:
             segments: 段落列表 [{"id": "seg_1", "text": "...", "markers": [...]}]
 
         Returns:
             分析结果
         """
-        # 构建提示词
-        system_prompt = """你是一个哲学文本分析专家，擅长分析论述的逻辑结构。
-请仔细分析给定的段落，识别它们之间的逻辑关系。"""
-
-        segments_text = "\n\n".join([
-            f"[段落{i+1}] ID: {seg['id']}\n时间: {seg.get('timestamp', 'N/A')}\n"
-            f"标记词: {', '.join(seg.get('markers', []))}\n"
-            f"内容: {seg['text']}"
-            for i, seg in enumerate(segments)
+        # 长段落先压缩为摘要，缩短分析请求的提示词
+        if self.summary_min_chars:
+            long_segments = [seg for seg in segments if len(seg['text']) > self.summary_min_chars]
+            if long_segments:
+                summaries = await self.summarize_segments(long_segments)
+                segments = [
+                    {**seg, 'text': summaries[seg['id']]} if seg['id'] in summaries else seg
+                    for seg in segments
+                ]
+
+        if len(segments) <= self.analysis_chunk_size:
+            return await self._analyze_chunk(segments)
+
+        chunks = _chunk_segments(segments, self.analysis_chunk_size)
+        partials = await asyncio.gather(*[
+            self._analyze_chunk(chunk, offset=i * self.analysis_chunk_size)
+            for i, chunk in enumerate(chunks)
         ])
 
-        prompt = f"""请分析以下段落的逻辑关系：
+        return await self._reduce_analyses(partials)
 
-{segments_text}
+    async def _analyze_chunk(self, segments: List[Dict], offset: int = 0) -> Dict:
+        """
+        在一次请求中分析一组段落
 
-请以JSON格式输出分析结果，包括：
-1. core_arguments: 核心论点列表（段落ID）
-2. supporting_points: 支撑论据列表（段落ID）
-3. logic_chains: 逻辑链路（每条链路包含相关段落ID和关系类型）
-4. paragraph_relations: 段落间的具体关系（source_id, target_id, relation_type, description）
-5. topic_tree: 主题树结构
+        Args:
+            segments: 段落列表
+            offset: 本组第一个段落在全文中的序号偏移
 
-输出格式示例：
-{{
-  "core_arguments": ["seg_1", "seg_5"],
-  "supporting_points": ["seg_2", "seg_3"],
-  "logic_chains": [
-    {{
-      "chain_id": "chain_1",
-      "chain_type": "MAIN_ARGUMENT",
-      "segments": ["seg_1", "seg_2", "seg_3"],
-      "description": "关于XX的核心论述"
-    }}
-  ],
-  "paragraph_relations": [
-    {{
-      "source_id": "seg_1",
-      "target_id": "seg_2",
-      "relation_type": "CAUSALITY",
-      "description": "因果关系：A导致B"
-    }}
-  ],
-  "topic_tree": {{
-    "main_topic": "核心主题",
-    "subtopics": [...]
-  }}
-}}
-"""
+        Returns:
+            分析结果
+        """
+        # 静态的任务说明与输出格式位于系统提示词中，只拼接可变的段落内容
+        segments_text = "".join(
+            _SEGMENT_TEMPLATE.format(
+                index=offset + i + 1,
+                id=seg['id'],
+                timestamp=seg.get('timestamp', 'N/A'),
+                markers=', '.join(seg.get('markers', [])),
+                text=seg['text'][:self.max_chars_per_seg]
+            )
+            for i, seg in enumerate(segments)
+        )
+        prompt = "请分析以下段落的逻辑关系：\n\n" + segments_text
 
         # 调用API
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, self._call_api, prompt, system_prompt)
+        response = await self._call_api(prompt, _ANALYSIS_SYSTEM_PROMPT)
 
-        # 解析JSON
+        # 解析JSON（必须是对象，数组等其他结构按解析失败处理）
         try:
-            # 尝试提取JSON块
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = response.strip()
-
-            result = json.loads(json_str)
-            return result
-        except json.JSONDecodeError as e:
+            return _parse_json(response, dict)
+        except ValueError as e:
             # 解析失败，返回默认结构
             return {
                 "core_arguments": [],
@@ -175,6 +539,75 @@ class QwenLLMClient(BaseLLMClient):
                 "error": str(e)
             }
 
+    async def _reduce_analyses(self, partials: List[Dict]) -> Dict:
+        """
+        合并分组分析的结果
+
+        段落级结果直接拼接；逻辑链与主题树由模型跨组合并
+
+        Args:
+            partials: 各组的分析结果
+
+        Returns:
+            合并后的分析结果
+        """
+        def collect(key):
+            return list(dict.fromkeys(
+                item for partial in partials for item in partial.get(key, [])
+                if isinstance(item, str)
+            ))
+
+        # 各组的链路ID可能重复，加上组号区分
+        logic_chains = [
+            {**chain, 'chain_id': f"part{i + 1}_{chain.get('chain_id', '')}"}
+            for i, partial in enumerate(partials)
+            for chain in partial.get('logic_chains', [])
+        ]
+        result = {
+            "core_arguments": collect('core_arguments'),
+            "supporting_points": collect('supporting_points'),
+            "logic_chains": logic_chains,
+            "paragraph_relations": [
+                relation
+                for partial in partials
+                for relation in partial.get('paragraph_relations', [])
+            ],
+            "topic_tree": {
+                "main_topic": next(
+                    (p['topic_tree'].get('main_topic') for p in partials if p.get('topic_tree')),
+                    "文档主题"
+                ),
+                "subtopics": [
+                    subtopic
+                    for partial in partials
+                    for subtopic in partial.get('topic_tree', {}).get('subtopics', [])
+                ]
+            }
+        }
+
+        prompt = _json_dumps({
+            "core_arguments": result['core_arguments'],
+            "logic_chains": logic_chains,
+            "topic_trees": [partial.get('topic_tree', {}) for partial in partials]
+        })
+
+        try:
+            reduced = _parse_json(await self._call_api(prompt, _REDUCE_SYSTEM_PROMPT), dict)
+        except (ValueError, RuntimeError):
+            # 合并失败时保留直接拼接的结果
+            return result
+
+        if isinstance(reduced, dict):
+            if reduced.get('logic_chains'):
+                # 按链路ID去重
+                result['logic_chains'] = list({
+                    chain.get('chain_id'): chain for chain in reduced['logic_chains']
+                }.values())
+            if reduced.get('topic_tree'):
+                result['topic_tree'] = reduced['topic_tree']
+
+        return result
+
     async def extract_topics(self, text: str) -> List[str]:
         """
         提取文本主题
@@ -192,24 +625,170 @@ class QwenLLMClient(BaseLLMClient):
 请以JSON数组格式输出，例如：["主题1", "主题2", "主题3"]
 """
 
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, self._call_api, prompt)
+        response = await self._call_api(prompt)
 
         try:
-            # 提取JSON数组
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "[" in response and "]" in response:
-                start = response.index("[")
-                end = response.rindex("]") + 1
-                json_str = response[start:end]
+            return _parse_json(response, list)
+        except ValueError:
+            return []
+
+    async def extract_topics_batch(self, texts: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        批量提取多段文本的主题
+
+        段落按 analysis_chunk_size 分组，每组一次请求，各组并发
+
+        Args:
+            texts: {段落ID: 文本内容}
+
+        Returns:
+            {段落ID: 主题列表}，提取失败的组不包含在内，由调用方逐段补充
+
+        Raises:
+            Exception: 所有组均失败时抛出第一组的异常
+        """
+        if not texts:
+            return {}
+
+        items = list(texts.items())
+        chunks = [
+            dict(items[i:i + self.analysis_chunk_size])
+            for i in range(0, len(items), self.analysis_chunk_size)
+        ]
+        results = await asyncio.gather(
+            *[self._extract_topics_chunk(chunk) for chunk in chunks],
+            return_exceptions=True
+        )
+
+        topics_map = {}
+        for result in results:
+            if not isinstance(result, Exception):
+                topics_map.update(result)
+        if not topics_map and all(isinstance(result, Exception) for result in results):
+            raise results[0]
+
+        return topics_map
+
+    async def _extract_topics_chunk(self, texts: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        在一次请求中提取一组段落的主题
+
+        Args:
+            texts: {段落ID: 文本内容}
+
+        Returns:
+            {段落ID: 主题列表}
+        """
+        texts_block = "\n\n".join(
+            f"[{seg_id}] {text[:self.max_chars_per_seg]}" for seg_id, text in texts.items()
+        )
+
+        prompt = f"""请分别分析以下各段落的主题，为每个段落提取3-5个关键主题词：
+
+{texts_block}
+
+请以JSON对象格式输出，键为段落ID，值为主题词数组，例如：
+{{"seg_1": ["主题1", "主题2"], "seg_2": ["主题3", "主题4"]}}
+"""
+
+        response = await self._call_api(prompt)
+
+        # 解析失败时直接抛出，由调用方回退到逐段提取
+        result = _parse_json(response, dict)
+
+        return {
+            seg_id: topics
+            for seg_id, topics in result.items()
+            if seg_id in texts and isinstance(topics, list)
+        }
+
+    async def summarize_segments(self, segments: List[Dict], max_tokens: int = 30) -> Dict[str, str]:
+        """
+        为每个段落生成简短摘要
+
+        摘要按段落单独缓存，同一段落在多次运行中只生成一次
+
+        Args:
+            segments: 段落列表 [{"id": "seg_1", "text": "..."}]
+            max_tokens: 摘要最大长度（字）
+
+        Returns:
+            {段落ID: 摘要}，生成失败的段落不包含在内
+        """
+        loop = asyncio.get_running_loop()
+        keys = [
+            LLMCache.make_key(self.model, _SUMMARY_SYSTEM_PROMPT, str(max_tokens), seg['text'])
+            for seg in segments
+        ]
+        # SQLite读写在线程池中执行，不阻塞事件循环
+        cached_list = (
+            await loop.run_in_executor(None, self.cache.get_many, keys)
+            if self.cache is not None else [None] * len(keys)
+        )
+
+        summaries = {}
+        pending = {}
+        for seg, key, cached in zip(segments, keys, cached_list):
+            if cached is None:
+                pending[seg['id']] = (key, seg['text'])
             else:
-                json_str = response.strip()
+                summaries[seg['id']] = cached
 
-            topics = json.loads(json_str)
-            return topics if isinstance(topics, list) else []
-        except:
-            return []
+        if not pending:
+            return summaries
+
+        items = list(pending.items())
+        chunks = [
+            items[i:i + self.analysis_chunk_size]
+            for i in range(0, len(items), self.analysis_chunk_size)
+        ]
+        results = await asyncio.gather(*[
+            self._summarize_chunk({seg_id: text for seg_id, (_, text) in chunk}, max_tokens)
+            for chunk in chunks
+        ], return_exceptions=True)
+
+        generated = {}
+        for result in results:
+            # 某组失败时，该组段落保留原文参与分析
+            if not isinstance(result, Exception):
+                generated.update(result)
+
+        summaries.update(generated)
+        if self.cache is not None and generated:
+            await loop.run_in_executor(None, self.cache.set_many, [
+                (pending[seg_id][0], summary) for seg_id, summary in generated.items()
+            ])
+
+        return summaries
+
+    async def _summarize_chunk(self, texts: Dict[str, str], max_tokens: int) -> Dict[str, str]:
+        """
+        在一次请求中为一组段落生成摘要
+
+        Args:
+            texts: {段落ID: 文本内容}
+            max_tokens: 摘要最大长度（字）
+
+        Returns:
+            {段落ID: 摘要}
+        """
+        texts_block = "\n\n".join(
+            f"[{seg_id}] {text[:self.max_chars_per_seg]}" for seg_id, text in texts.items()
+        )
+        prompt = f"请为以下每个段落写不超过{max_tokens}字的摘要：\n\n{texts_block}"
+
+        # 摘要已按段落缓存，这里不再缓存整组响应
+        result = _parse_json(await self._generate(prompt, _SUMMARY_SYSTEM_PROMPT), dict)
+
+        return {
+            seg_id: summary
+            for seg_id, summary in result.items()
+            if seg_id in texts and isinstance(summary, str) and summary
+        }
+
+
+# Mock客户端的固定主题
+_MOCK_TOPICS = ("哲学", "认识论", "现象学")
 
 
 class MockLLMClient(BaseLLMClient):
@@ -240,7 +819,17 @@ class MockLLMClient(BaseLLMClient):
     async def extract_topics(self, text: str) -> List[str]:
         """模拟主题提取"""
         await asyncio.sleep(0.3)
-        return ["哲学", "认识论", "现象学"]
+        return list(_MOCK_TOPICS)
+
+    async def extract_topics_batch(self, texts: Dict[str, str]) -> Dict[str, List[str]]:
+        """模拟批量主题提取"""
+        await asyncio.sleep(0.3)
+        return {seg_id: list(_MOCK_TOPICS) for seg_id in texts}
+
+    async def summarize_segments(self, segments: List[Dict], max_tokens: int = 30) -> Dict[str, str]:
+        """模拟段落摘要"""
+        await asyncio.sleep(0.3)
+        return {seg['id']: seg['text'][:max_tokens] for seg in segments}
 
 
 class LLMClient:
@@ -263,7 +852,18 @@ class LLMClient:
         if self.provider == "qwen":
             return QwenLLMClient(
                 api_key=self.config.get('api_key'),
-                model=self.config.get('model', 'qwen-max')
+                model=self.config.get('model', 'qwen-max'),
+                cache_dir=self.config.get('cache_dir'),
+                cache_ttl=self.config.get('cache_ttl'),
+                base_url=self.config.get('base_url', DASHSCOPE_GENERATION_URL),
+                max_chars_per_seg=self.config.get('max_chars_per_seg', 1000),
+                analysis_chunk_size=self.config.get('analysis_chunk_size', 20),
+                summary_min_chars=self.config.get('summary_min_chars', 200),
+                max_connections=self.config.get('max_connections', 64),
+                max_retries=self.config.get('max_retries', 3),
+                retry_backoff=self.config.get('retry_backoff', 0.3),
+                connect_timeout=self.config.get('connect_timeout', 10.0),
+                read_timeout=self.config.get('read_timeout', 120.0)
             )
         elif self.provider == "mock":
             return MockLLMClient()
@@ -278,6 +878,18 @@ class LLMClient:
         """提取主题"""
         return await self.client.extract_topics(text)
 
+    async def extract_topics_batch(self, texts: Dict[str, str]) -> Dict[str, List[str]]:
+        """批量提取主题"""
+        return await self.client.extract_topics_batch(texts)
+
+    async def summarize_segments(self, segments: List[Dict], max_tokens: int = 30) -> Dict[str, str]:
+        """生成段落摘要"""
+        return await self.client.summarize_segments(segments, max_tokens)
+
+    async def aclose(self):
+        """关闭客户端"""
+        await self.client.aclose()
+
 
 # 测试代码
 if __name__ == "__main__":
@@ -5,7 +5,7 @@
 
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from pathlib import Path
 
 try:
@@ -40,6 +40,33 @@ class BaseSTTClient(ABC):
         """
         pass
 
+    @property
+    def supports_batch(self) -> bool:
+        """是否提供真正的批量转录接口（子类覆盖了 transcribe_files）"""
+        return type(self).transcribe_files is not BaseSTTClient.transcribe_files
+
+    async def transcribe_files(self, audio_paths: List[str]) -> List[STTResult]:
+        """
+        转录一批音频文件
+
+        默认逐个并发调用 transcribe，子类可覆盖为单次批量请求
+
+        Args:
+            audio_paths: 音频文件路径列表
+
+        Returns:
+            与 audio_paths 一一对应的STTResult列表，失败的文件返回空文本并在metadata中记录错误
+        """
+        results = await asyncio.gather(
+            *[self.transcribe(path) for path in audio_paths],
+            return_exceptions=True
+        )
+        return [
+            STTResult(text="", confidence=0.0, metadata={'error': str(result)})
+            if isinstance(result, Exception) else result
+            for result in results
+        ]
+
 
 class AliyunSTTClient(BaseSTTClient):
     """阿里云语音识别客户端"""
@@ -98,6 +125,64 @@ class AliyunSTTClient(BaseSTTClient):
         except Exception as e:
             raise RuntimeError(f"阿里云STT错误: {str(e)}")
 
+    async def transcribe_files(self, audio_paths: List[str]) -> List[STTResult]:
+        """
+        在一个识别任务中转录一批音频文件
+
+        Args:
+            audio_paths: 音频文件路径列表
+
+        Returns:
+            与 audio_paths 一一对应的STTResult列表，失败的文件返回空文本并在metadata中记录错误
+        """
+        if not audio_paths:
+            return []
+
+        file_urls = [f'file://{Path(path).absolute()}' for path in audio_paths]
+
+        def recognize():
+            # Paraformer的file_urls支持一次提交多个文件
+            task_response = Recognition.call(
+                model='paraformer-v1',
+                file_urls=file_urls,
+                language_hints=['zh']
+            )
+            if task_response.status_code != 200:
+                raise RuntimeError(f"转录失败: {task_response}")
+
+            task_id = task_response.output.task_id
+            result = Recognition.wait(task=task_id)
+            if result.status_code != 200:
+                raise RuntimeError(f"转录失败: {result}")
+            return task_id, result.output.get('results', [])
+
+        try:
+            # SDK调用是阻塞的，放到线程池中等待任务完成
+            loop = asyncio.get_running_loop()
+            task_id, transcripts = await loop.run_in_executor(None, recognize)
+        except Exception as e:
+            raise RuntimeError(f"阿里云STT错误: {str(e)}")
+
+        by_url = {item.get('file_url'): item for item in transcripts}
+        results = []
+        for file_url in file_urls:
+            item = by_url.get(file_url)
+            if item is None or item.get('subtask_status', 'SUCCEEDED') != 'SUCCEEDED':
+                results.append(STTResult(
+                    text="",
+                    confidence=0.0,
+                    metadata={'task_id': task_id, 'error': str(item)}
+                ))
+            else:
+                # 这里简化处理，实际需要下载并解析结果文件
+                results.append(STTResult(
+                    text=item.get('transcription_url', ''),
+                    confidence=0.95,
+                    metadata={'task_id': task_id}
+                ))
+
+        return results
+
 
 class MockSTTClient(BaseSTTClient):
     """Mock STT客户端（用于测试）"""
@@ -162,36 +247,53 @@ class STTClient:
         """
         return await self.client.transcribe(audio_path)
 
-    async def transcribe_batch(self, audio_paths: list, max_concurrent: int = 5) -> list:
+    @property
+    def supports_batch(self) -> bool:
+        """当前提供商是否支持批量转录请求"""
+        return self.client.supports_batch
+
+    async def transcribe_files(self, audio_paths: List[str]) -> List[STTResult]:
+        """
+        以一次批量请求转录一批音频
+
+        Args:
+            audio_paths: 音频文件路径列表
+
+        Returns:
+            与 audio_paths 一一对应的STTResult列表
+        """
+        return await self.client.transcribe_files(audio_paths)
+
+    async def transcribe_batch(self, audio_paths: list, max_concurrent: int = 5,
+                               batch_size: int = None) -> list:
         """
         批量转录音频
 
         Args:
             audio_paths: 音频文件路径列表
-            max_concurrent: 最大并发数
+            max_concurrent: 同时转录的最大文件数
+            batch_size: 每次批量请求的文件数（默认等于 max_concurrent；
+                提供商不支持批量请求时忽略，逐个文件转录）
 
         Returns:
             STTResult列表
         """
-        semaphore = asyncio.Semaphore(max_concurrent)
+        # 没有批量接口时按文件并发，避免每批都等待其中最慢的文件
+        batch_size = (batch_size or max_concurrent) if self.supports_batch else 1
+        semaphore = asyncio.Semaphore(max(1, max_concurrent // batch_size))
 
-        async def transcribe_with_limit(path):
+        async def transcribe_with_limit(paths):
             async with semaphore:
-                return await self.transcribe(path)
+                try:
+                    return await self.transcribe_files(paths)
+                except Exception:
+                    # 整批失败，返回空结果
+                    return [STTResult(text="", confidence=0.0) for _ in paths]
 
-        tasks = [transcribe_with_limit(path) for path in audio_paths]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # 处理异常
-        processed_results = []
-        for result in results:
-            if isinstance(result, Exception):
-                # 转录失败，返回空结果
-                processed_results.append(STTResult(text="", confidence=0.0))
-            else:
-                processed_results.append(result)
+        batches = [audio_paths[i:i + batch_size] for i in range(0, len(audio_paths), batch_size)]
+        results = await asyncio.gather(*[transcribe_with_limit(batch) for batch in batches])
 
-        return processed_results
+        return [result for batch_results in results for result in batch_results]
 
 
 # 测试代码
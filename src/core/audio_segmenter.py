@@ -4,31 +4,114 @@
 """
 
 import os
-import uuid
-from typing import List, Tuple
+import re
+import sys
+import json
+import wave
+import asyncio
+import hashlib
+from typing import AsyncIterator, List, Optional, Tuple
 from pathlib import Path
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
-try:
-    import torch
-    from pydub import AudioSegment as PyAudioSegment
-    from pydub.silence import detect_nonsilent
-except ImportError:
-    # 在实际运行时需要安装这些依赖
-    pass
+import numpy as np
 
 from ..models.document import Segment
+from ..utils.jit import njit
+
+# 关闭线程池时取消尚未开始的任务（cancel_futures 需要 Python 3.9+）
+_SHUTDOWN_OPTIONS = {'cancel_futures': True} if sys.version_info >= (3, 9) else {}
+
+
+@njit(cache=True)
+def _merge_ranges(ranges, min_ms):
+    """合并过短区间，ranges为 (N, 2) 的int32数组"""
+    n = ranges.shape[0]
+    merged = np.empty((n, 2), dtype=np.int32)
+    if n == 0:
+        return merged
+
+    count = 0
+    current_start = ranges[0, 0]
+    current_end = ranges[0, 1]
+    for i in range(1, n):
+        if current_end - current_start < min_ms:
+            # 当前段落太短，尝试合并
+            current_end = ranges[i, 1]
+        else:
+            merged[count, 0] = current_start
+            merged[count, 1] = current_end
+            count += 1
+            current_start = ranges[i, 0]
+            current_end = ranges[i, 1]
+
+    # 添加最后一个段落
+    merged[count, 0] = current_start
+    merged[count, 1] = current_end
+    count += 1
+
+    return merged[:count]
+
+
+@njit(cache=True)
+def _split_ranges(ranges, max_ms):
+    """切分过长区间，ranges为 (N, 2) 的int32数组"""
+    n = ranges.shape[0]
+
+    # 预先计算输出长度
+    total = 0
+    for i in range(n):
+        duration = ranges[i, 1] - ranges[i, 0]
+        total += duration // max_ms + 1 if duration > max_ms else 1
+
+    split = np.empty((total, 2), dtype=np.int32)
+    k = 0
+    for i in range(n):
+        start = ranges[i, 0]
+        end = ranges[i, 1]
+        duration = end - start
+        if duration > max_ms:
+            num_splits = duration // max_ms + 1
+            split_duration = duration / num_splits
+            for j in range(num_splits):
+                split[k, 0] = int(start + j * split_duration)
+                split[k, 1] = int(start + (j + 1) * split_duration)
+                k += 1
+        else:
+            split[k, 0] = start
+            split[k, 1] = end
+            k += 1
+
+    return split
+
+
+# 导入时预编译，避免首次分段时的JIT延迟
+_merge_ranges(np.zeros((1, 2), dtype=np.int32), 0)
+_split_ranges(np.zeros((1, 2), dtype=np.int32), 1)
+
+
+# 解析ffmpeg silencedetect输出
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?\d+(?:\.\d+)?)")
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
 
 
 class AudioSegmenter:
     """音频分段器"""
 
+    # 输出音频片段（及静音检测）的采样率与静音检测帧长
+    SAMPLE_RATE = 16000
+    VAD_FRAME_MS = 30
+
     def __init__(self,
                  pause_threshold: float = 1.5,
                  min_segment_duration: float = 0.5,
                  max_segment_duration: float = 30.0,
                  silence_thresh: int = -40,
-                 output_dir: str = "data/audio_segments"):
+                 output_dir: str = "data/audio_segments",
+                 max_workers: int = None,
+                 use_cache: bool = True,
+                 use_silencedetect: bool = True):
         """
         初始化音频分段器
 
@@ -38,13 +121,20 @@ class AudioSegmenter:
             max_segment_duration: 最大段落时长（秒）
             silence_thresh: 静音阈值（dBFS）
             output_dir: 输出目录
+            max_workers: 并发写出音频片段的最大线程数（默认为CPU核数）
+            use_cache: 是否缓存分段区间（同一文件、同一参数重复处理时跳过静音检测）
+            use_silencedetect: 是否使用ffmpeg silencedetect滤镜检测静音（不在内存中解码音频）
         """
         self.pause_threshold = pause_threshold
         self.min_segment_duration = min_segment_duration
         self.max_segment_duration = max_segment_duration
         self.silence_thresh = silence_thresh
+        self.max_workers = max_workers or os.cpu_count()
+        self.use_cache = use_cache
+        self.use_silencedetect = use_silencedetect
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = self.output_dir / '.vad_cache'
 
     def extract_audio_from_video(self, video_path: str, output_path: str = None) -> str:
         """
@@ -78,102 +168,267 @@ class AudioSegmenter:
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"音频提取失败: {e.stderr.decode()}")
 
-    def detect_pauses(self, audio: PyAudioSegment) -> List[Tuple[int, int]]:
+    def cut_segment(self, audio_path: str, start_ms: int, end_ms: int, output_path: str) -> str:
         """
-        检测音频中的非静音段落
+        使用ffmpeg从源文件中截取音频片段
 
         Args:
-            audio: 音频对象
+            audio_path: 源音频文件路径
+            start_ms: 开始时间（毫秒）
+            end_ms: 结束时间（毫秒）
+            output_path: 输出音频路径
 
         Returns:
-            非静音段落列表 [(start_ms, end_ms), ...]
+            截取的音频文件路径
+        """
+        command = [
+            'ffmpeg',
+            '-ss', f'{start_ms / 1000:.3f}',  # 输入端定位，无需解码之前的内容
+            '-i', audio_path,
+            '-t', f'{(end_ms - start_ms) / 1000:.3f}',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(self.SAMPLE_RATE),
+            '-ac', '1',
+            '-y',
+            output_path
+        ]
+
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            return output_path
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"音频切分失败: {e.stderr.decode()}")
+
+    def write_segment(self, samples: np.ndarray, start_ms: int, end_ms: int,
+                      output_path: str) -> str:
         """
-        # 将停顿阈值转换为毫秒
-        min_silence_len = int(self.pause_threshold * 1000)
+        将PCM采样片段直接写为wav文件
 
-        # 检测非静音段落
-        nonsilent_ranges = detect_nonsilent(
-            audio,
-            min_silence_len=min_silence_len,
-            silence_thresh=self.silence_thresh
-        )
+        Args:
+            samples: PCM采样数组（int16，采样率为SAMPLE_RATE）
+            start_ms: 开始时间（毫秒）
+            end_ms: 结束时间（毫秒）
+            output_path: 输出音频路径
+
+        Returns:
+            写出的音频文件路径
+        """
+        rate = self.SAMPLE_RATE
+        with wave.open(output_path, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(rate)
+            # 连续切片直接以缓冲区写出，无需额外复制
+            wav_file.writeframes(samples[start_ms * rate // 1000:end_ms * rate // 1000])
 
-        return nonsilent_ranges
+        return output_path
 
-    def merge_short_segments(self, segments: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    def load_pcm(self, audio_path: str) -> np.ndarray:
         """
-        合并过短的段落
+        使用ffmpeg将音频解码为单声道16-bit PCM
 
         Args:
-            segments: 段落列表
+            audio_path: 音频文件路径
 
         Returns:
-            合并后的段落列表
+            采样数组（int16，采样率为SAMPLE_RATE）
         """
-        if not segments:
-            return []
+        command = [
+            'ffmpeg',
+            '-i', audio_path,
+            '-f', 's16le',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(self.SAMPLE_RATE),
+            '-ac', '1',
+            '-'  # 输出到stdout
+        ]
 
-        min_duration_ms = int(self.min_segment_duration * 1000)
-        merged = []
-        current_start, current_end = segments[0]
+        try:
+            result = subprocess.run(command, check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"音频解码失败: {e.stderr.decode()}")
+
+        return np.frombuffer(result.stdout, dtype=np.int16)
+
+    def detect_pauses(self, samples: np.ndarray) -> np.ndarray:
+        """
+        检测音频中的非静音段落
 
-        for start, end in segments[1:]:
-            if current_end - current_start < min_duration_ms:
-                # 当前段落太短，尝试合并
-                current_end = end
+        Args:
+            samples: PCM采样数组（int16，采样率为SAMPLE_RATE）
+
+        Returns:
+            非静音段落数组，形状 (N, 2) 的int32，每行为 [start_ms, end_ms]
+        """
+        frame_ms = self.VAD_FRAME_MS
+        frame_samples = self.SAMPLE_RATE * frame_ms // 1000
+        total_ms = len(samples) * 1000 // self.SAMPLE_RATE
+
+        # 按帧计算RMS能量（dBFS），末尾不足一帧的部分补零
+        num_frames = -(-len(samples) // frame_samples)
+        if num_frames == 0:
+            return np.empty((0, 2), dtype=np.int32)
+        frames = np.zeros(num_frames * frame_samples, dtype=np.float32)
+        frames[:len(samples)] = samples
+        frames = frames.reshape(num_frames, frame_samples)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        rms_db = 20 * np.log10(rms / 32768.0 + 1e-9)
+
+        voiced = rms_db > self.silence_thresh
+        if not voiced.any():
+            return np.empty((0, 2), dtype=np.int32)
+
+        # 游程编码得到连续的非静音帧区间 [start, end)
+        edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+
+        # 间隔短于停顿阈值的静音不视为停顿，合并两侧区间
+        min_silence_frames = int(self.pause_threshold * 1000) // frame_ms
+        keep = (starts[1:] - ends[:-1]) >= min_silence_frames
+        starts = np.concatenate((starts[:1], starts[1:][keep]))
+        ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+
+        ranges = np.empty((len(starts), 2), dtype=np.int32)
+        ranges[:, 0] = starts * frame_ms
+        ranges[:, 1] = np.minimum(ends * frame_ms, total_ms)
+        return ranges
+
+    def detect_pauses_ffmpeg(self, audio_path: str) -> np.ndarray:
+        """
+        使用ffmpeg silencedetect滤镜检测非静音段落
+
+        静音检测在ffmpeg解码过程中完成，音频数据不进入Python内存
+
+        Args:
+            audio_path: 音频文件路径
+
+        Returns:
+            非静音段落数组，形状 (N, 2) 的int32，每行为 [start_ms, end_ms]
+        """
+        command = [
+            'ffmpeg',
+            '-i', audio_path,
+            '-af', f'silencedetect=noise={self.silence_thresh}dB:d={self.pause_threshold}',
+            '-f', 'null',
+            '-'
+        ]
+
+        result = subprocess.run(command, capture_output=True)
+        log = result.stderr.decode(errors='replace')
+        if result.returncode != 0:
+            raise RuntimeError(f"静音检测失败: {log}")
+
+        duration_match = _DURATION_RE.search(log)
+        if duration_match is None:
+            raise RuntimeError(f"无法获取音频时长: {audio_path}")
+        hours, minutes, seconds = duration_match.groups()
+        total_ms = int((int(hours) * 3600 + int(minutes) * 60 + float(seconds)) * 1000)
+
+        # 静音区间取反得到非静音区间
+        ranges = []
+        voiced_start = 0
+        for kind, value in _SILENCE_RE.findall(log):
+            position_ms = min(max(int(float(value) * 1000), 0), total_ms)
+            if kind == 'start':
+                if position_ms > voiced_start:
+                    ranges.append((voiced_start, position_ms))
+                voiced_start = total_ms  # 静音持续到文件末尾时不再有非静音段
             else:
-                merged.append((current_start, current_end))
-                current_start, current_end = start, end
+                voiced_start = position_ms
+        if voiced_start < total_ms:
+            ranges.append((voiced_start, total_ms))
 
-        # 添加最后一个段落
-        merged.append((current_start, current_end))
+        return np.asarray(ranges, dtype=np.int32).reshape(-1, 2)
 
-        return merged
+    def merge_short_segments(self, segments: np.ndarray) -> np.ndarray:
+        """
+        合并过短的段落
+
+        Args:
+            segments: 段落区间数组，形状 (N, 2)
 
-    def split_long_segments(self, segments: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        Returns:
+            合并后的段落区间数组
+        """
+        ranges = np.asarray(segments, dtype=np.int32).reshape(-1, 2)
+        if len(ranges) == 0:
+            return ranges
+
+        min_duration_ms = int(self.min_segment_duration * 1000)
+        return _merge_ranges(ranges, min_duration_ms)
+
+    def split_long_segments(self, segments: np.ndarray) -> np.ndarray:
         """
         切分过长的段落
 
         Args:
-            segments: 段落列表
+            segments: 段落区间数组，形状 (N, 2)
 
         Returns:
-            切分后的段落列表
+            切分后的段落区间数组
         """
-        max_duration_ms = int(self.max_segment_duration * 1000)
-        split_segments = []
-
-        for start, end in segments:
-            duration = end - start
-            if duration > max_duration_ms:
-                # 切分为多个段落
-                num_splits = int(duration / max_duration_ms) + 1
-                split_duration = duration / num_splits
-
-                for i in range(num_splits):
-                    split_start = int(start + i * split_duration)
-                    split_end = int(start + (i + 1) * split_duration)
-                    split_segments.append((split_start, split_end))
-            else:
-                split_segments.append((start, end))
+        ranges = np.asarray(segments, dtype=np.int32).reshape(-1, 2)
+        if len(ranges) == 0:
+            return ranges
 
-        return split_segments
+        max_duration_ms = int(self.max_segment_duration * 1000)
+        return _split_ranges(ranges, max_duration_ms)
 
-    def segment_audio(self, audio_path: str) -> List[Segment]:
+    def _cache_path(self, audio_path: str) -> Path:
         """
-        对音频进行分段
+        获取分段区间缓存文件路径（按文件内容哈希、检测方式与分段参数区分）
 
         Args:
             audio_path: 音频文件路径
 
         Returns:
-            段落列表
+            缓存文件路径
         """
-        # 加载音频
-        audio = PyAudioSegment.from_file(audio_path)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(audio_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+        detector = "silencedetect" if self.use_silencedetect else "vad"
+        params = (f"{detector}_{self.pause_threshold}_{self.min_segment_duration}_"
+                  f"{self.max_segment_duration}_{self.silence_thresh}")
+        return self.cache_dir / f"{digest.hexdigest()}_{params}.json"
 
-        # 检测非静音段落
-        nonsilent_ranges = self.detect_pauses(audio)
+    def analyze_audio(self, audio_path: str) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        解码音频并计算分段区间
+
+        命中缓存或使用silencedetect时不解码音频，返回的采样数组为None
+
+        Args:
+            audio_path: 音频文件路径
+
+        Returns:
+            (PCM采样数组或None, 形状 (N, 2) 的分段区间数组)
+        """
+        cache_path = self._cache_path(audio_path) if self.use_cache else None
+        if cache_path is not None and cache_path.exists():
+            ranges = json.loads(cache_path.read_text(encoding='utf-8'))
+            return None, np.asarray(ranges, dtype=np.int32).reshape(-1, 2)
+
+        samples = None
+        nonsilent_ranges = None
+        if self.use_silencedetect:
+            try:
+                nonsilent_ranges = self.detect_pauses_ffmpeg(audio_path)
+            except RuntimeError:
+                # ffmpeg缺少silencedetect滤镜等情况下改用内存中的静音检测，
+                # 其结果不写入silencedetect的缓存
+                nonsilent_ranges = None
+                cache_path = None
+
+        if nonsilent_ranges is None:
+            # 解码音频，采样同时用于静音检测与写出片段
+            samples = self.load_pcm(audio_path)
+
+            # 检测非静音段落
+            nonsilent_ranges = self.detect_pauses(samples)
 
         # 合并短段落
         merged_ranges = self.merge_short_segments(nonsilent_ranges)
@@ -181,55 +436,162 @@ class AudioSegmenter:
         # 切分长段落
         final_ranges = self.split_long_segments(merged_ranges)
 
-        # 创建Segment对象并保存音频片段
-        segments = []
-        for idx, (start_ms, end_ms) in enumerate(final_ranges):
-            # 生成唯一ID
-            segment_id = f"seg_{uuid.uuid4().hex[:8]}"
-
-            # 提取音频片段
-            segment_audio = audio[start_ms:end_ms]
-            segment_path = str(self.output_dir / f"{segment_id}.wav")
-            segment_audio.export(segment_path, format="wav")
-
-            # 创建Segment对象
-            segment = Segment(
+        if cache_path is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再原子替换，并发读取时不会读到写了一半的缓存
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(json.dumps(final_ranges.tolist()).encode('utf-8'))
+            os.replace(tmp_path, cache_path)
+
+        return samples, final_ranges
+
+    def _save_segment(self, audio_path: str, samples: Optional[np.ndarray],
+                      start_ms: int, end_ms: int, output_path: str) -> str:
+        """写出音频片段：已解码时直接写PCM，否则用ffmpeg从源文件截取"""
+        if samples is None:
+            return self.cut_segment(audio_path, start_ms, end_ms, output_path)
+        return self.write_segment(samples, start_ms, end_ms, output_path)
+
+    def _build_segments(self, audio_path: str, ranges: np.ndarray) -> List[Segment]:
+        """根据分段区间创建Segment对象"""
+        source = Path(audio_path)
+        output_dir = str(self.output_dir)
+        # 源文件路径的短哈希：片段文件共用输出目录，用于区分不同目录下的同名源文件
+        tag = hashlib.blake2b(str(source.resolve()).encode('utf-8'), digest_size=4).hexdigest()
+        # 生成唯一ID（源文件名 + 路径哈希 + 序号）
+        segment_ids = [f"seg_{source.stem}_{tag}_{idx:05d}" for idx in range(len(ranges))]
+
+        # 毫秒一次性换算为秒
+        return [
+            Segment(
                 id=segment_id,
-                start_time=start_ms / 1000.0,
-                end_time=end_ms / 1000.0,
-                audio_path=segment_path
+                start_time=start_sec,
+                end_time=end_sec,
+                audio_path=os.path.join(output_dir, f"{segment_id}.wav")
             )
-            segments.append(segment)
+            for segment_id, (start_sec, end_sec) in zip(segment_ids, (ranges / 1000.0).tolist())
+        ]
+
+    def segment_audio(self, audio_path: str) -> List[Segment]:
+        """
+        对音频进行分段
+
+        Args:
+            audio_path: 音频文件路径
+
+        Returns:
+            段落列表
+        """
+        samples, final_ranges = self.analyze_audio(audio_path)
+        segments = self._build_segments(audio_path, final_ranges)
+
+        # 并发写出各音频片段
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(
+                self._save_segment,
+                [audio_path] * len(final_ranges),
+                [samples] * len(final_ranges),
+                final_ranges[:, 0].tolist(),
+                final_ranges[:, 1].tolist(),
+                [seg.audio_path for seg in segments]
+            ))
 
         return segments
 
-    def process(self, input_file: str) -> List[Segment]:
+    async def segment_audio_iter(self, audio_path: str) -> AsyncIterator[Segment]:
         """
-        处理视频或音频文件
+        对音频进行分段，每个片段写出完成后立即产出
+
+        片段按完成顺序产出，不保证时间顺序
+
+        Args:
+            audio_path: 音频文件路径
+
+        Yields:
+            已写出音频片段的Segment对象
+        """
+        loop = asyncio.get_running_loop()
+        samples, final_ranges = await loop.run_in_executor(None, self.analyze_audio, audio_path)
+        segments = self._build_segments(audio_path, final_ranges)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        async def write(segment, start_ms, end_ms):
+            await loop.run_in_executor(
+                executor, self._save_segment,
+                audio_path, samples, start_ms, end_ms, segment.audio_path
+            )
+            return segment
+
+        tasks = [
+            asyncio.ensure_future(write(seg, start_ms, end_ms))
+            for seg, (start_ms, end_ms) in zip(segments, final_ranges.tolist())
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前结束迭代或出错时取消剩余的写出任务；
+            # 不等待正在运行的截取完成，避免阻塞事件循环线程
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False, **_SHUTDOWN_OPTIONS)
+
+    def _resolve_audio_path(self, input_file: str) -> str:
+        """
+        获取输入文件对应的音频路径（视频文件先提取音频）
 
         Args:
             input_file: 输入文件路径
 
         Returns:
-            段落列表
+            音频文件路径
         """
         # 检查文件类型
         file_ext = Path(input_file).suffix.lower()
 
         if file_ext in ['.mp4', '.avi', '.mov', '.mkv', '.flv']:
             # 视频文件，先提取音频
-            audio_path = self.extract_audio_from_video(input_file)
+            return self.extract_audio_from_video(input_file)
         elif file_ext in ['.wav', '.mp3', '.flac', '.m4a']:
             # 音频文件，直接处理
-            audio_path = input_file
+            return input_file
         else:
             raise ValueError(f"不支持的文件格式: {file_ext}")
 
+    def process(self, input_file: str) -> List[Segment]:
+        """
+        处理视频或音频文件
+
+        Args:
+            input_file: 输入文件路径
+
+        Returns:
+            段落列表
+        """
+        audio_path = self._resolve_audio_path(input_file)
+
         # 进行音频分段
         segments = self.segment_audio(audio_path)
 
         return segments
 
+    async def process_iter(self, input_file: str) -> AsyncIterator[Segment]:
+        """
+        处理视频或音频文件，逐个产出切分完成的段落
+
+        Args:
+            input_file: 输入文件路径
+
+        Yields:
+            Segment对象
+        """
+        loop = asyncio.get_running_loop()
+        audio_path = await loop.run_in_executor(None, self._resolve_audio_path, input_file)
+
+        async for segment in self.segment_audio_iter(audio_path):
+            yield segment
+
 
 # 测试代码
 if __name__ == "__main__":
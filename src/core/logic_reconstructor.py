@@ -7,6 +7,7 @@ import asyncio
 from typing import List, Dict
 from ..models.document import Segment, LogicChain, Document
 from ..api.llm_client import LLMClient
+from ..utils.event_loop import new_event_loop
 
 
 class LogicReconstructor:
@@ -20,6 +21,7 @@ class LogicReconstructor:
             llm_client: LLM客户端实例
         """
         self.llm_client = llm_client or LLMClient(provider="mock")
+        self._loop = None
 
     async def extract_topics_for_segments(self, segments: List[Segment]) -> List[Segment]:
         """
@@ -31,17 +33,78 @@ class LogicReconstructor:
         Returns:
             添加了主题标签的段落列表
         """
+        # 文本相同（忽略空白差异）的段落只提取一次
+        buckets: Dict[str, List[Segment]] = {}
         for segment in segments:
-            if segment.text:
-                try:
-                    topics = await self.llm_client.extract_topics(segment.text)
-                    segment.topics = topics
-                except Exception as e:
-                    print(f"提取主题失败: {e}")
-                    segment.topics = []
+            key = " ".join(segment.text.split())
+            if key:
+                buckets.setdefault(key, []).append(segment)
+
+        if not buckets:
+            return segments
+
+        representatives = [group[0] for group in buckets.values()]
+
+        # 优先在一次请求中批量提取
+        try:
+            topics_map = await self.llm_client.extract_topics_batch(
+                {seg.id: seg.text for seg in representatives}
+            )
+        except Exception as e:
+            print(f"批量提取主题失败，改为逐段提取: {e}")
+            topics_map = {}
+
+        # 批量结果中缺失的段落逐段补充提取
+        missing = [seg for seg in representatives if seg.id not in topics_map]
+        if missing:
+            topics_map.update(await self._extract_topics_parallel(missing))
+
+        for group in buckets.values():
+            topics = topics_map.get(group[0].id, [])
+            for segment in group:
+                segment.topics = list(topics)
 
         return segments
 
+    async def extract_topic_for_segment(self, segment: Segment) -> Segment:
+        """
+        为单个段落提取主题标签
+
+        Args:
+            segment: 段落
+
+        Returns:
+            添加了主题标签的段落（提取失败时主题为空）
+        """
+        try:
+            segment.topics = await self.llm_client.extract_topics(segment.text)
+        except Exception as e:
+            print(f"提取主题失败: {e}")
+            segment.topics = []
+
+        return segment
+
+    async def _extract_topics_parallel(self, segments: List[Segment]) -> Dict[str, List[str]]:
+        """
+        逐段并发提取主题
+
+        Args:
+            segments: 段落列表（均含文本）
+
+        Returns:
+            {段落ID: 主题列表}
+        """
+        semaphore = asyncio.Semaphore(self.llm_client.config.get('max_concurrent', 8))
+
+        async def extract_with_limit(segment):
+            async with semaphore:
+                return await self.extract_topic_for_segment(segment)
+
+        # 各段落的主题提取相互独立，并发请求
+        await asyncio.gather(*[extract_with_limit(seg) for seg in segments])
+
+        return {segment.id: segment.topics for segment in segments}
+
     async def analyze_logic_structure(self, segments: List[Segment]) -> Dict:
         """
         分析整体逻辑结构
@@ -59,8 +122,7 @@ class LogicReconstructor:
                 'id': seg.id,
                 'text': seg.text,
                 'timestamp': seg.format_timestamp(),
-                'markers': seg.markers,
-                'topics': seg.topics
+                'markers': seg.markers
             })
 
         # 调用LLM进行分析
@@ -163,13 +225,12 @@ class LogicReconstructor:
         Returns:
             Document对象
         """
-        # 1. 提取主题
-        print("正在提取段落主题...")
-        segments = await self.extract_topics_for_segments(segments)
-
-        # 2. 分析逻辑结构
-        print("正在分析逻辑结构...")
-        analysis_result = await self.analyze_logic_structure(segments)
+        # 1-2. 提取主题与分析逻辑结构互不依赖，并发执行
+        print("正在提取段落主题并分析逻辑结构...")
+        segments, analysis_result = await asyncio.gather(
+            self.extract_topics_for_segments(segments),
+            self.analyze_logic_structure(segments)
+        )
 
         # 3. 构建逻辑链
         print("正在构建逻辑链...")
@@ -204,13 +265,47 @@ class LogicReconstructor:
         """
         同步接口：执行逻辑重构
 
+        多次调用复用同一事件循环与HTTP会话，用完后需调用 close()，
+        或以 with LogicReconstructor(...) as reconstructor: 的方式使用
+
         Args:
             segments: 段落列表
 
         Returns:
             Document对象
         """
-        return asyncio.run(self.reconstruct(segments))
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "process() 不能在运行中的事件循环内调用，请改用 await reconstructor.reconstruct(segments)"
+            )
+
+        # 多次调用复用同一事件循环，LLM客户端的HTTP会话也随之复用
+        if self._loop is None or self._loop.is_closed():
+            self._loop = new_event_loop()
+
+        return self._loop.run_until_complete(self.reconstruct(segments))
+
+    def close(self):
+        """释放同步接口使用的事件循环及LLM客户端资源"""
+        if self._loop is None or self._loop.is_closed():
+            return
+
+        try:
+            self._loop.run_until_complete(self.llm_client.aclose())
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 
 # 测试代码
@@ -4,8 +4,172 @@
 """
 
 import re
-from typing import List, Dict, Tuple
+import functools
+import itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
 from ..models.document import Segment, ParagraphRelation, RelationType
+from ..utils.jit import njit
+
+try:
+    import ahocorasick
+except ImportError:
+    # 可选依赖：未安装时使用预编译的正则表达式匹配
+    ahocorasick = None
+
+
+@njit(cache=True)
+def _score_segments(base_scores, ref_counts, text_lengths):
+    """
+    批量计算段落重要性
+
+    base_scores为含标记词加分的基础分数，ref_counts为各段落参与的关系数，
+    text_lengths为文本长度，三者按段落顺序对齐
+    """
+    n = base_scores.shape[0]
+    scores = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        # 被多个段落引用 -> 更重要
+        score = base_scores[i] + min(ref_counts[i] * 0.1, 0.3)
+        # 文本长度较长 -> 可能更重要
+        if text_lengths[i] > 100:
+            score += 0.1
+        scores[i] = min(score, 1.0)
+    return scores
+
+
+# 导入时完成编译（有缓存时直接加载），避免首次调用的编译延迟
+_score_segments(np.zeros(1, dtype=np.float64), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+
+class _RegexAutomaton:
+    """
+    基于正则多选分支的标记词匹配器
+
+    接口与 pyahocorasick.Automaton 的 add_word / make_automaton / iter 一致；
+    所有关键词编译为一个按长度降序排列的多选分支，单次扫描文本，
+    同一位置优先匹配较长的关键词，匹配结果互不重叠。
+    注意 pyahocorasick 的 iter 会返回全部重叠匹配（如“与此相反”中的“相反”），
+    两者的原始输出并不相同，需经 _resolve_overlaps 处理后才一致
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+        self._pattern = None
+
+    def add_word(self, word: str, value: Any) -> None:
+        """
+        添加关键词
+
+        Args:
+            word: 关键词
+            value: 匹配时返回的值
+        """
+        self._values[word] = value
+
+    def make_automaton(self) -> None:
+        """编译正则表达式"""
+        # 中文之间不存在\b单词边界，不加边界断言
+        self._pattern = re.compile('|'.join(
+            re.escape(word) for word in sorted(self._values, key=len, reverse=True)
+        )) if self._values else None
+
+    def iter(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """
+        单次扫描文本
+
+        Args:
+            text: 文本内容
+
+        Returns:
+            迭代 (匹配结束位置, 值)
+        """
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(text):
+            yield match.end() - 1, self._values[match.group()]
+
+
+def _resolve_overlaps(
+    located: List[Tuple[int, str, RelationType]]
+) -> List[Tuple[int, str, RelationType]]:
+    """
+    去除重叠的标记词匹配，保留最左、最长的匹配
+
+    Args:
+        located: [(起始位置, 标记词, 关系类型), ...]，顺序任意
+
+    Returns:
+        按起始位置排序、互不重叠的匹配列表
+    """
+    located.sort(key=lambda x: (x[0], -len(x[1])))
+    resolved = []
+    last_end = 0
+    for item in located:
+        if item[0] >= last_end:
+            resolved.append(item)
+            last_end = item[0] + len(item[1])
+    return resolved
+
+
+def _compile_marker_table(markers: Dict) -> Tuple[Dict[str, RelationType], Any]:
+    """
+    编译标记词表
+
+    Args:
+        markers: {关系类型: {'keywords': [...]}}
+
+    Returns:
+        (标记词 -> 关系类型的反向索引, 匹配全部标记词的自动机)
+    """
+    # 同一标记词属于多个类型时取第一个
+    kw2rel: Dict[str, RelationType] = {}
+    for relation_type, config in markers.items():
+        for keyword in config['keywords']:
+            kw2rel.setdefault(keyword, relation_type)
+
+    # 所有标记词构建为一个自动机，单次扫描即可找出全部标记词；
+    # 由反向索引构建，匹配结果与评分使用同一关系类型
+    automaton = ahocorasick.Automaton() if ahocorasick is not None else _RegexAutomaton()
+    for keyword, relation_type in kw2rel.items():
+        automaton.add_word(keyword, (keyword, relation_type))
+    automaton.make_automaton()
+
+    return kw2rel, automaton
+
+
+@functools.lru_cache(maxsize=None)
+def _build_marker_table(analyzer_cls) -> Tuple[Dict[str, RelationType], Any]:
+    """
+    编译分析器类内置的标记词表（每个类只编译一次，各实例共享）
+
+    Args:
+        analyzer_cls: SemanticAnalyzer 或其子类
+
+    Returns:
+        同 _compile_marker_table
+    """
+    return _compile_marker_table(analyzer_cls.SEMANTIC_MARKERS)
+
+
+# 各关系类型的关系描述模板
+_RELATION_DESCRIPTIONS = {
+    relation_type: f"通过标记词'{{}}'识别的{relation_type.value}关系"
+    for relation_type in RelationType
+}
+
+# 标记词检测结果缓存的最大条目数
+_MARKER_CACHE_SIZE = 4096
+
+# 批量扫描时拼接文本使用的分隔符（不会出现在标记词中，匹配不会跨越段落）
+_TEXT_SEPARATOR = '\x1f'
+
+# 切分段落时每批合并扫描的段落数（远小于缓存容量，扫描结果在切分前不会被清出）
+_SCAN_BATCH_SIZE = 512
 
 
 class SemanticAnalyzer:
@@ -33,38 +197,118 @@ class SemanticAnalyzer:
         },
     }
 
-    def __init__(self, custom_markers: Dict = None):
+    def __init__(self, custom_markers: Dict = None, max_workers: int = None):
         """
         初始化语义分析器
 
         Args:
             custom_markers: 自定义标记词（可选）
+            max_workers: 并行切分段落的最大线程数（默认不并行；
+                标记词扫描持有GIL时多线程没有收益，仅在无GIL的解释器上建议开启）
         """
-        self.markers = self.SEMANTIC_MARKERS.copy()
+        self.max_workers = max_workers
+        # 复制关键词列表，合并自定义标记词时不修改类属性
+        self.markers = {
+            relation_type: {**config, 'keywords': list(config['keywords'])}
+            for relation_type, config in self.SEMANTIC_MARKERS.items()
+        }
         if custom_markers:
             # 合并自定义标记词
             for relation_type, config in custom_markers.items():
                 if relation_type in self.markers:
                     self.markers[relation_type]['keywords'].extend(config.get('keywords', []))
+            self._kw2rel, self.automaton = _compile_marker_table(self.markers)
+        else:
+            self._kw2rel, self.automaton = _build_marker_table(type(self))
 
-    def detect_markers(self, text: str) -> List[Tuple[str, RelationType]]:
+        # 按文本缓存标记词位置，同一文本在切分与关系分析中只扫描一次
+        self._marker_cache: Dict[str, List[Tuple[int, str, RelationType]]] = {}
+
+    def _locate_markers(self, text: str) -> List[Tuple[int, str, RelationType]]:
         """
-        检测文本中的语义标记词
+        查找文本中所有标记词的位置（带缓存）
 
         Args:
             text: 文本内容
 
         Returns:
-            [(标记词, 关系类型), ...]
+            [(起始位置, 标记词, 关系类型), ...]，按起始位置排序，互不重叠
         """
-        found_markers = []
+        located = self._marker_cache.get(text)
+        if located is None:
+            matches = self.automaton.iter(text)
+            first = next(matches, None)
+            if first is None:
+                # 多数段落不含标记词，无需构建和排序匹配结果
+                located = []
+            else:
+                # 自动机返回结束位置，据此还原标记词起始位置
+                located = _resolve_overlaps([
+                    (end - len(marker) + 1, marker, relation_type)
+                    for end, (marker, relation_type) in itertools.chain((first,), matches)
+                ])
+            self._cache_markers(text, located)
+        return located
+
+    def _cache_markers(self, text: str, located: List[Tuple[int, str, RelationType]]) -> None:
+        """写入标记词缓存（超出容量时清空）"""
+        if len(self._marker_cache) >= _MARKER_CACHE_SIZE:
+            self._marker_cache.clear()
+        self._marker_cache[text] = located
+
+    def _prefetch_markers(self, texts: List[str]) -> None:
+        """
+        拼接多段文本一次扫描，将各文本的标记词位置写入缓存
+
+        Args:
+            texts: 文本列表
+        """
+        pending = [text for text in dict.fromkeys(texts) if text not in self._marker_cache]
+        if not pending:
+            return
+
+        joined = _TEXT_SEPARATOR.join(pending)
+        starts = np.cumsum([0] + [len(text) + 1 for text in pending[:-1]])
+        hits = list(self.automaton.iter(joined))
+        located = [[] for _ in pending]
+
+        if hits:
+            # 按匹配结束位置定位所属文本
+            ends = np.fromiter((end for end, _ in hits), dtype=np.int64, count=len(hits))
+            owners = np.searchsorted(starts, ends, side='right') - 1
+            offsets = starts.tolist()
+            for owner, (end, (marker, relation_type)) in zip(owners.tolist(), hits):
+                located[owner].append((end - len(marker) + 1 - offsets[owner], marker, relation_type))
+
+        for text, items in zip(pending, located):
+            self._cache_markers(text, _resolve_overlaps(items))
+
+    def detect_markers_batch(self, texts: List[str]) -> List[List[Tuple[str, RelationType]]]:
+        """
+        批量检测多段文本中的语义标记词（合并为一次扫描）
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            与 texts 一一对应的 detect_markers 结果
+        """
+        self._prefetch_markers(texts)
+        return [self.detect_markers(text) for text in texts]
+
+    def detect_markers(self, text: str) -> List[Tuple[str, RelationType]]:
+        """
+        检测文本中的语义标记词
 
-        for relation_type, config in self.markers.items():
-            for keyword in config['keywords']:
-                if keyword in text:
-                    found_markers.append((keyword, relation_type))
+        Args:
+            text: 文本内容
 
-        return found_markers
+        Returns:
+            [(标记词, 关系类型), ...]，按首次出现顺序排列，不含重复
+        """
+        return list(dict.fromkeys(
+            (marker, relation_type) for _, marker, relation_type in self._locate_markers(text)
+        ))
 
     def split_by_markers(self, segment: Segment) -> List[Segment]:
         """
@@ -77,69 +321,73 @@ class SemanticAnalyzer:
             切分后的段落列表
         """
         text = segment.text
-        markers = self.detect_markers(text)
-
-        if not markers:
-            # 没有标记词，返回原段落
-            return [segment]
-
-        # 查找标记词位置
-        split_points = []
-        for marker, relation_type in markers:
-            # 使用正则表达式查找标记词位置（避免部分匹配）
-            pattern = r'\b' + re.escape(marker) + r'\b'
-            for match in re.finditer(pattern, text):
-                split_points.append((match.start(), marker, relation_type))
+        split_points = self._locate_markers(text)
 
         if not split_points:
+            # 没有标记词，返回原段落
             return [segment]
 
-        # 按位置排序
-        split_points.sort(key=lambda x: x[0])
+        def cache_sub_markers(start: int, end: int, points) -> None:
+            # 子段落的标记词可直接由父段落的扫描结果得出，后续关系分析无需重新扫描
+            raw = text[start:end]
+            offset = start + len(raw) - len(raw.lstrip())
+            sub_text = raw.strip()
+            self._cache_markers(sub_text, [
+                (pos - offset, marker, relation_type)
+                for pos, marker, relation_type in points
+                if pos >= offset and pos + len(marker) <= offset + len(sub_text)
+            ])
+
+        # 估算时间戳（简单按字符比例分配），所有切分位置一次性换算为时间
+        offsets = np.fromiter(
+            (pos for pos, _marker, _rt in split_points), dtype=np.int64, count=len(split_points)
+        )
+        split_times = (segment.start_time + offsets * (segment.duration / len(text))).tolist()
 
         # 执行切分
         sub_segments = []
         last_pos = 0
+        last_time = segment.start_time
+        # 起始于 last_pos 及之后的第一个标记词下标，每个子段落只需查看自己范围内的标记词
+        first = 0
 
         for i, (pos, marker, relation_type) in enumerate(split_points):
             # 提取子段落文本
             sub_text = text[last_pos:pos].strip()
 
             if sub_text:
-                # 估算时间戳（简单按字符比例分配）
-                char_ratio_start = last_pos / len(text)
-                char_ratio_end = pos / len(text)
-                duration = segment.duration
-                sub_start = segment.start_time + char_ratio_start * duration
-                sub_end = segment.start_time + char_ratio_end * duration
-
                 # 创建子段落
                 sub_seg = Segment(
                     id=f"{segment.id}_sub{i}",
-                    start_time=sub_start,
-                    end_time=sub_end,
+                    start_time=last_time,
+                    end_time=split_times[i],
                     audio_path=segment.audio_path,  # 共享音频文件
                     text=sub_text,
                     markers=[],
                     confidence=segment.confidence
                 )
                 sub_segments.append(sub_seg)
+                cache_sub_markers(last_pos, pos, split_points[first:i])
 
+            if pos != last_pos:
+                first = i
             last_pos = pos
+            last_time = split_times[i]
 
         # 添加最后一个子段落
         last_text = text[last_pos:].strip()
         if last_text:
             sub_seg = Segment(
                 id=f"{segment.id}_sub{len(split_points)}",
-                start_time=segment.start_time + (last_pos / len(text)) * segment.duration,
+                start_time=last_time,
                 end_time=segment.end_time,
                 audio_path=segment.audio_path,
                 text=last_text,
-                markers=[marker for _, marker, _ in split_points if _ >= last_pos],
+                markers=list(dict.fromkeys(marker for _pos, marker, _rt in split_points[first:])),
                 confidence=segment.confidence
             )
             sub_segments.append(sub_seg)
+            cache_sub_markers(last_pos, len(text), split_points[first:])
 
         return sub_segments if sub_segments else [segment]
 
@@ -153,24 +401,26 @@ class SemanticAnalyzer:
         Returns:
             添加了关系信息的段落列表
         """
-        for i, segment in enumerate(segments):
+        prev_segment = None
+        for segment in segments:
             # 检测当前段落的标记词
             markers = self.detect_markers(segment.text)
             segment.markers = [marker for marker, _ in markers]
 
             # 建立与前一段落的关系
-            if i > 0 and markers:
-                prev_segment = segments[i - 1]
-                for marker, relation_type in markers:
-                    relation = ParagraphRelation(
+            if prev_segment is not None and markers:
+                segment.relations.extend(
+                    ParagraphRelation(
                         source_id=prev_segment.id,
                         target_id=segment.id,
                         relation_type=relation_type,
                         marker_words=[marker],
                         confidence=0.8,
-                        description=f"通过标记词'{marker}'识别的{relation_type.value}关系"
+                        description=_RELATION_DESCRIPTIONS[relation_type].format(marker)
                     )
-                    segment.relations.append(relation)
+                    for marker, relation_type in markers
+                )
+            prev_segment = segment
 
         return segments
 
@@ -184,53 +434,77 @@ class SemanticAnalyzer:
         Returns:
             优化后的段落列表
         """
-        # 第一步：根据语义标记词切分
-        refined_segments = []
-        for segment in segments:
-            sub_segments = self.split_by_markers(segment)
-            refined_segments.extend(sub_segments)
+        # 第一步：根据语义标记词切分（各段落相互独立，可并行）
+        executor = None
+        if self.max_workers and self.max_workers > 1 and len(segments) > 1:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        sub_segment_lists = []
+        try:
+            for start in range(0, len(segments), _SCAN_BATCH_SIZE):
+                batch = segments[start:start + _SCAN_BATCH_SIZE]
+                # 整批文本合并扫描一次，切分时直接读取缓存
+                self._prefetch_markers([seg.text for seg in batch])
+                mapper = executor.map if executor is not None else map
+                sub_segment_lists.extend(mapper(self.split_by_markers, batch))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        refined_segments = [seg for sub_segments in sub_segment_lists for seg in sub_segments]
 
         # 第二步：分析段落关系
         refined_segments = self.analyze_relations(refined_segments)
 
         return refined_segments
 
-    def calculate_importance(self, segment: Segment, all_segments: List[Segment]) -> float:
+    @staticmethod
+    def count_references(segments: List[Segment]) -> Counter:
+        """
+        统计每个段落参与的关系数
+
+        Args:
+            segments: 所有段落
+
+        Returns:
+            {段落ID: 关系数}
+        """
+        ref_counts = Counter()
+        for s in segments:
+            for r in s.relations:
+                ref_counts[r.target_id] += 1
+                if r.source_id != r.target_id:
+                    ref_counts[r.source_id] += 1
+        return ref_counts
+
+    def calculate_importance(self, segment: Segment, ref_counts: Dict[str, int]) -> float:
         """
         计算段落重要性
 
         Args:
             segment: 当前段落
-            all_segments: 所有段落
+            ref_counts: 各段落参与的关系数（见 count_references）
 
         Returns:
             重要性分数 (0-1)
         """
-        score = 0.5  # 基础分数
-
-        # 1. 包含总结类标记词 -> 更重要
-        for marker in segment.markers:
-            for relation_type, config in self.markers.items():
-                if marker in config['keywords']:
-                    if relation_type == RelationType.SUMMARY:
-                        score += 0.3
-                    elif relation_type == RelationType.CAUSALITY:
-                        score += 0.2
-                    break
-
-        # 2. 被多个段落引用 -> 更重要
-        reference_count = sum(
-            1 for s in all_segments
-            for r in s.relations
-            if r.target_id == segment.id or r.source_id == segment.id
+        scores = _score_segments(
+            np.array([self._marker_score(segment)], dtype=np.float64),
+            np.array([ref_counts.get(segment.id, 0)], dtype=np.int64),
+            np.array([len(segment.text)], dtype=np.int64)
         )
-        score += min(reference_count * 0.1, 0.3)
-
-        # 3. 文本长度较长 -> 可能更重要
-        if len(segment.text) > 100:
-            score += 0.1
+        return float(scores[0])
 
-        return min(score, 1.0)
+    def _marker_score(self, segment: Segment) -> float:
+        """基础分数加上标记词加分：包含总结、因果类标记词 -> 更重要"""
+        score = 0.5  # 基础分数
+        for marker in segment.markers:
+            relation_type = self._kw2rel.get(marker)
+            if relation_type == RelationType.SUMMARY:
+                score += 0.3
+            elif relation_type == RelationType.CAUSALITY:
+                score += 0.2
+        return score
 
     def process(self, segments: List[Segment]) -> List[Segment]:
         """
@@ -245,9 +519,16 @@ class SemanticAnalyzer:
         # 优化分段
         refined = self.refine_segments(segments)
 
-        # 计算重要性
-        for seg in refined:
-            seg.importance_score = self.calculate_importance(seg, refined)
+        # 计算重要性（各项特征转为数组后批量打分）
+        ref_counts = self.count_references(refined)
+        n = len(refined)
+        scores = _score_segments(
+            np.fromiter((self._marker_score(seg) for seg in refined), dtype=np.float64, count=n),
+            np.fromiter((ref_counts.get(seg.id, 0) for seg in refined), dtype=np.int64, count=n),
+            np.fromiter((len(seg.text) for seg in refined), dtype=np.int64, count=n)
+        )
+        for seg, score in zip(refined, scores.tolist()):
+            seg.importance_score = score
 
         return refined
 
@@ -268,9 +549,22 @@ if __name__ == "__main__":
     # 检测标记词
     markers = analyzer.detect_markers(seg1.text)
     print(f"检测到的标记词: {markers}")
+    # 中文标记词前后没有单词边界，也必须能被识别
+    assert '但是' in [marker for marker, _ in markers]
 
     # 切分段落
     sub_segs = analyzer.split_by_markers(seg1)
     print(f"切分为 {len(sub_segs)} 个子段落")
     for s in sub_segs:
         print(f"  - {s.text}")
+    assert len(sub_segs) == 2 and sub_segs[1].text.startswith('但是')
+
+    # 同一标记词属于多个类型时，检测结果与评分均取第一个类型
+    shared = SemanticAnalyzer(custom_markers={RelationType.SUMMARY: {'keywords': ['所以']}})
+    assert shared.detect_markers('所以如此') == [('所以', RelationType.CAUSALITY)]
+    assert shared._kw2rel['所以'] is RelationType.CAUSALITY
+
+    # 分析段落关系
+    analyzer.analyze_relations(sub_segs)
+    print("段落关系:")
+    print("\n".join(r.display for s in sub_segs for r in s.relations))
@@ -3,10 +3,48 @@
 负责将音频段落转换为文字
 """
 
+import time
 import asyncio
-from typing import List
+from typing import AsyncIterable, List, Optional
 from ..models.document import Segment
-from ..api.stt_client import STTClient
+from ..api.stt_client import STTClient, STTResult
+
+
+class _ProgressThrottle:
+    """限制进度回调频率，避免段落较多时频繁触发界面刷新"""
+
+    def __init__(self, callback, interval: float = 0.1):
+        """
+        初始化节流器
+
+        Args:
+            callback: 进度回调函数 callback(current, total)，可为None
+            interval: 两次回调的最小间隔（秒）
+        """
+        self.callback = callback
+        self.interval = interval
+        self._last_time = float('-inf')
+        self._pending = None
+
+    def update(self, current: int, total: Optional[int]):
+        """报告进度，间隔内的更新只保留最新一次；完成时总是回调"""
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if current == total or now - self._last_time >= self.interval:
+            self._last_time = now
+            self._pending = None
+            self.callback(current, total)
+        else:
+            self._pending = (current, total)
+
+    def flush(self):
+        """补发被节流掉的最后一次进度"""
+        if self._pending is not None:
+            current, total = self._pending
+            self._pending = None
+            self._last_time = time.monotonic()
+            self.callback(current, total)
 
 
 class Transcriber:
@@ -42,36 +80,113 @@ class Transcriber:
 
         return segment
 
+    async def transcribe_batch(self, segments: List[Segment]) -> List[Segment]:
+        """
+        以一次批量请求转录一组段落
+
+        Args:
+            segments: 段落列表
+
+        Returns:
+            更新后的段落列表
+        """
+        try:
+            results = await self.stt_client.transcribe_files([seg.audio_path for seg in segments])
+        except Exception as e:
+            print(f"批量转录 {len(segments)} 个段落失败: {e}")
+            results = [STTResult(text="", confidence=0.0) for _ in segments]
+
+        for segment, result in zip(segments, results):
+            if 'error' in result.metadata:
+                print(f"转录段落 {segment.id} 失败: {result.metadata['error']}")
+            segment.text = result.text
+            segment.confidence = result.confidence
+
+        return segments
+
     async def transcribe_segments(self, segments: List[Segment],
                                    max_concurrent: int = 5,
-                                   progress_callback=None) -> List[Segment]:
+                                   progress_callback=None,
+                                   batch_size: int = None) -> List[Segment]:
         """
         批量转录段落
 
         Args:
             segments: 段落列表
-            max_concurrent: 最大并发数
+            max_concurrent: 同时转录的最大段落数
             progress_callback: 进度回调函数 callback(current, total)
+            batch_size: 每次批量请求的段落数（默认等于 max_concurrent；
+                STT提供商不支持批量请求时忽略，逐段转录）
 
         Returns:
             转录后的段落列表
         """
-        semaphore = asyncio.Semaphore(max_concurrent)
+        # 没有批量接口时逐段转录，max_concurrent 个工作协程构成滑动窗口，
+        # 避免每批都等待其中最慢的段落
+        batch_size = (batch_size or max_concurrent) if self.stt_client.supports_batch else 1
+        num_workers = max(1, max_concurrent // batch_size)
+        progress = _ProgressThrottle(progress_callback)
         completed = 0
         total = len(segments)
 
-        async def transcribe_with_progress(seg):
+        batches = [segments[i:i + batch_size] for i in range(0, len(segments), batch_size)]
+        results = [None] * len(batches)
+
+        # 固定数量的工作协程从队列取批次，任务数与段落数无关
+        queue = asyncio.Queue()
+        for item in enumerate(batches):
+            queue.put_nowait(item)
+        for _ in range(num_workers):
+            queue.put_nowait(None)
+
+        async def worker():
             nonlocal completed
-            async with semaphore:
-                result = await self.transcribe_segment(seg)
-                completed += 1
-                if progress_callback:
-                    progress_callback(completed, total)
-                return result
+            while (item := queue.get_nowait()) is not None:
+                index, batch = item
+                results[index] = await self.transcribe_batch(batch)
+                completed += len(batch)
+                progress.update(completed, total)
 
-        tasks = [transcribe_with_progress(seg) for seg in segments]
-        transcribed_segments = await asyncio.gather(*tasks)
+        await asyncio.gather(*[worker() for _ in range(num_workers)])
 
+        return [segment for batch in results for segment in batch]
+
+    async def transcribe_stream(self, segments: AsyncIterable[Segment],
+                                max_concurrent: int = 5,
+                                progress_callback=None) -> List[Segment]:
+        """
+        边产出边转录段落（与音频切分流水线并行）
+
+        Args:
+            segments: 段落异步迭代器（如 AudioSegmenter.process_iter）
+            max_concurrent: 最大并发数
+            progress_callback: 进度回调函数 callback(current, total)，总数未知时total为None
+
+        Returns:
+            按时间排序的转录后段落列表
+        """
+        queue = asyncio.Queue(maxsize=max_concurrent * 2)
+        progress = _ProgressThrottle(progress_callback)
+        transcribed_segments = []
+
+        async def produce():
+            try:
+                async for segment in segments:
+                    await queue.put(segment)
+            finally:
+                # 通知所有消费者结束
+                for _ in range(max_concurrent):
+                    await queue.put(None)
+
+        async def consume():
+            while (segment := await queue.get()) is not None:
+                transcribed_segments.append(await self.transcribe_segment(segment))
+                progress.update(len(transcribed_segments), None)
+
+        await asyncio.gather(produce(), *[consume() for _ in range(max_concurrent)])
+        progress.flush()
+
+        transcribed_segments.sort(key=lambda seg: seg.start_time)
         return transcribed_segments
 
     def process(self, segments: List[Segment], max_concurrent: int = 5) -> List[Segment]:
@@ -2,6 +2,7 @@
 主窗口界面
 """
 
+import os
 import sys
 from pathlib import Path
 
@@ -18,6 +19,13 @@ except ImportError:
     class QMainWindow:
         pass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from ..utils.event_loop import new_event_loop
+
 
 class ProcessingThread(QThread):
     """处理线程"""
@@ -29,6 +37,22 @@ class ProcessingThread(QThread):
     def __init__(self, file_path: str):
         super().__init__()
         self.file_path = file_path
+        # 处理流程中的异步步骤共用一个事件循环
+        self._loop = None
+
+    def _run_async(self, coro):
+        """在本线程的事件循环中执行协程"""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    def _close_loop(self):
+        """关闭本线程的事件循环"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+        self._loop.close()
+        self._loop = None
 
     def run(self):
         """执行处理流程"""
@@ -40,23 +64,22 @@ class ProcessingThread(QThread):
             from ..api.stt_client import STTClient
             from ..api.llm_client import LLMClient
 
-            # 1. 音频分段
+            # 1-2. 音频分段与语音转文字（片段切分完成即开始转录）
             self.status.emit("正在分析音频并进行分段...")
             segmenter = AudioSegmenter()
-            segments = segmenter.process(self.file_path)
-            self.progress.emit(1, 4)
-
-            # 2. 语音转文字
-            self.status.emit(f"正在转录 {len(segments)} 个音频段落...")
             stt_client = STTClient(provider="mock")  # 使用mock进行演示
             transcriber = Transcriber(stt_client)
 
             def progress_callback(current, total):
-                self.status.emit(f"正在转录: {current}/{total}")
-
-            import asyncio
-            segments = asyncio.run(
-                transcriber.transcribe_segments(segments, progress_callback=progress_callback)
+                if current == 1:
+                    self.progress.emit(1, 4)
+                self.status.emit(f"正在转录: 已完成 {current} 个段落")
+
+            segments = self._run_async(
+                transcriber.transcribe_stream(
+                    segmenter.process_iter(self.file_path),
+                    progress_callback=progress_callback
+                )
             )
             self.progress.emit(2, 4)
 
@@ -70,7 +93,10 @@ class ProcessingThread(QThread):
             self.status.emit("正在重构逻辑结构...")
             llm_client = LLMClient(provider="mock")  # 使用mock进行演示
             reconstructor = LogicReconstructor(llm_client)
-            document = reconstructor.process(segments)
+            try:
+                document = self._run_async(reconstructor.reconstruct(segments))
+            finally:
+                self._run_async(llm_client.aclose())
             document.source_file = self.file_path
             self.progress.emit(4, 4)
 
@@ -79,6 +105,8 @@ class ProcessingThread(QThread):
         except Exception as e:
             import traceback
             self.error.emit(f"处理失败: {str(e)}\n{traceback.format_exc()}")
+        finally:
+            self._close_loop()
 
 
 class MainWindow(QMainWindow):
@@ -242,40 +270,40 @@ class MainWindow(QMainWindow):
             return
 
         # 显示段落列表
-        segments_html = "<h2>段落列表</h2>\n"
+        segments_parts = ["<h2>段落列表</h2>\n"]
         for i, seg in enumerate(self.document.segments, 1):
-            importance_star = "⭐" * int(seg.importance_score * 5)
             core_mark = " [核心论点]" if seg.is_core_argument else ""
             markers_str = ", ".join(seg.markers) if seg.markers else "无"
 
-            segments_html += f"""
+            segments_parts.append(f"""
             <div style="margin-bottom: 20px; padding: 10px; background-color: #f5f5f5; border-radius: 5px;">
-                <h3>段落 {i} {core_mark} {importance_star}</h3>
-                <p><strong>时间:</strong> {seg.format_timestamp()}</p>
+                <h3>段落 {i} {core_mark} {seg.stars}</h3>
+                <p><strong>时间:</strong> {seg.formatted_timestamp}</p>
                 <p><strong>标记词:</strong> {markers_str}</p>
                 <p><strong>主题:</strong> {", ".join(seg.topics) if seg.topics else "无"}</p>
                 <p><strong>内容:</strong> {seg.text}</p>
             </div>
-            """
+            """)
 
-        self.segments_text.setHtml(segments_html)
+        self.segments_text.setHtml("".join(segments_parts))
 
         # 显示逻辑结构
-        logic_html = "<h2>逻辑结构</h2>\n"
-        logic_html += f"<p><strong>核心论点数:</strong> {len(self.document.get_core_arguments())}</p>\n"
-        logic_html += f"<p><strong>逻辑链数:</strong> {len(self.document.logic_chains)}</p>\n"
-
-        logic_html += "<h3>逻辑链路</h3>\n"
+        logic_parts = [
+            "<h2>逻辑结构</h2>\n",
+            f"<p><strong>核心论点数:</strong> {self.document.core_argument_count}</p>\n",
+            f"<p><strong>逻辑链数:</strong> {len(self.document.logic_chains)}</p>\n",
+            "<h3>逻辑链路</h3>\n"
+        ]
         for chain in self.document.logic_chains:
-            logic_html += f"""
+            logic_parts.append(f"""
             <div style="margin-bottom: 15px; padding: 10px; background-color: #e3f2fd; border-radius: 5px;">
                 <h4>{chain.chain_type}</h4>
                 <p><strong>描述:</strong> {chain.description}</p>
                 <p><strong>包含段落:</strong> {len(chain.segments)} 个</p>
             </div>
-            """
+            """)
 
-        self.logic_text.setHtml(logic_html)
+        self.logic_text.setHtml("".join(logic_parts))
 
         # 显示详细信息
         details_html = f"""
@@ -299,12 +327,14 @@ class MainWindow(QMainWindow):
         if not tree:
             return "暂无主题树"
 
-        result = "  " * indent + f"• {tree.get('main_topic', '未知主题')}\n"
-        for subtopic in tree.get('subtopics', []):
-            if isinstance(subtopic, dict):
-                result += "  " * (indent + 1) + f"- {subtopic.get('name', '未知')}\n"
+        lines = ["  " * indent + f"• {tree.get('main_topic', '未知主题')}"]
+        lines.extend(
+            "  " * (indent + 1) + f"- {subtopic.get('name', '未知')}"
+            for subtopic in tree.get('subtopics', [])
+            if isinstance(subtopic, dict)
+        )
 
-        return result
+        return "\n".join(lines) + "\n"
 
     def export_results(self):
         """导出结果"""
@@ -320,9 +350,20 @@ class MainWindow(QMainWindow):
 
         if file_path:
             try:
-                import json
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.document.to_dict(), f, ensure_ascii=False, indent=2)
+                dumps = None
+                if orjson is not None:
+                    def dumps(obj):
+                        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+                # 逐段序列化写出到临时文件，完成后原子替换，导出失败时不留下不完整的文件
+                tmp_path = f"{file_path}.tmp"
+                try:
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        f.writelines(self.document.iter_json_chunks(dumps))
+                    os.replace(tmp_path, file_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
 
                 QMessageBox.information(self, "成功", f"结果已导出到:\n{file_path}")
             except Exception as e:
@@ -2,12 +2,21 @@
 数据模型定义
 """
 
+import sys
+import json
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 from enum import Enum
 
 
+# Python 3.10+ 使用 __slots__ 存储字段，减少每个实例的内存占用
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# 重要性星级字符串（0-5星），预先生成以便显示时直接复用
+_IMPORTANCE_STARS = tuple("⭐" * i for i in range(6))
+
+
 class RelationType(Enum):
     """段落关系类型"""
     CONTRAST = "转折"          # 转折关系
@@ -20,7 +29,7 @@ class RelationType(Enum):
     UNKNOWN = "未知"           # 未知关系
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ParagraphRelation:
     """段落关系"""
     source_id: str                      # 源段落ID
@@ -29,6 +38,13 @@ class ParagraphRelation:
     marker_words: List[str] = field(default_factory=list)  # 识别到的标记词
     confidence: float = 0.0             # 关系置信度 (0-1)
     description: str = ""               # 关系描述
+    @property
+    def display(self) -> str:
+        """显示用字符串"""
+        return (
+            f"{self.source_id} → {self.target_id}: {self.relation_type.value}\n"
+            f"    标记词: {', '.join(self.marker_words)}"
+        )
 
     def to_dict(self) -> Dict:
         """转换为字典"""
@@ -42,7 +58,7 @@ class ParagraphRelation:
         }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Segment:
     """音频段落"""
     id: str                             # 段落唯一ID
@@ -56,6 +72,10 @@ class Segment:
     relations: List[ParagraphRelation] = field(default_factory=list)  # 段落关系
     confidence: float = 0.0             # 转录置信度
     is_core_argument: bool = False      # 是否为核心论点
+    # 格式化时间戳缓存 (开始时间, 结束时间, 结果)，时间变化后自动失效
+    _timestamp_cache: Optional[Tuple[float, float, str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @property
     def duration(self) -> float:
@@ -64,11 +84,28 @@ class Segment:
 
     def format_timestamp(self) -> str:
         """格式化时间戳"""
+        cache = self._timestamp_cache
+        if cache is not None and cache[0] == self.start_time and cache[1] == self.end_time:
+            return cache[2]
+
         start_min = int(self.start_time // 60)
         start_sec = int(self.start_time % 60)
         end_min = int(self.end_time // 60)
         end_sec = int(self.end_time % 60)
-        return f"{start_min:02d}:{start_sec:02d} - {end_min:02d}:{end_sec:02d}"
+        timestamp = f"{start_min:02d}:{start_sec:02d} - {end_min:02d}:{end_sec:02d}"
+        self._timestamp_cache = (self.start_time, self.end_time, timestamp)
+        return timestamp
+
+    @property
+    def formatted_timestamp(self) -> str:
+        """格式化时间戳（带缓存）"""
+        return self.format_timestamp()
+
+    @property
+    def stars(self) -> str:
+        """重要性星级显示字符串"""
+        level = min(max(int(self.importance_score * 5), 0), 5)
+        return _IMPORTANCE_STARS[level]
 
     def to_dict(self) -> Dict:
         """转换为字典"""
@@ -88,7 +125,7 @@ class Segment:
         }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class LogicChain:
     """逻辑链"""
     chain_id: str                       # 链路唯一ID
@@ -108,7 +145,7 @@ class LogicChain:
         }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Document:
     """文档（处理后的完整结果）"""
     source_file: str                    # 源文件路径
@@ -117,13 +154,29 @@ class Document:
     topic_tree: Dict = field(default_factory=dict)  # 主题树结构
     metadata: Dict = field(default_factory=dict)    # 元数据
     created_at: datetime = field(default_factory=datetime.now)  # 创建时间
+    # 段落ID -> 在段落列表中的下标（重复ID取第一个）
+    _id_index: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _indexed_segments: Optional[List[Segment]] = field(default=None, init=False, repr=False, compare=False)
+    _indexed_count: int = field(default=0, init=False, repr=False, compare=False)
+
+    def _rebuild_index(self):
+        """重建段落ID索引"""
+        id_index = {}
+        for i, seg in enumerate(self.segments):
+            id_index.setdefault(seg.id, i)
+        self._id_index = id_index
+        self._indexed_count = len(self.segments)
+        self._indexed_segments = self.segments
+
+    def _ensure_index(self):
+        """段落列表被替换或增删后重建索引"""
+        if self._indexed_segments is not self.segments or self._indexed_count != len(self.segments):
+            self._rebuild_index()
 
     @property
     def total_duration(self) -> float:
-        """总时长"""
-        if not self.segments:
-            return 0.0
-        return max(seg.end_time for seg in self.segments)
+        """总时长（按当前段落实时计算，段落时间被直接修改后也保持正确）"""
+        return max((seg.end_time for seg in self.segments), default=0.0)
 
     @property
     def segment_count(self) -> int:
@@ -132,8 +185,16 @@ class Document:
 
     def get_segment_by_id(self, segment_id: str) -> Optional[Segment]:
         """根据ID获取段落"""
-        for seg in self.segments:
+        self._ensure_index()
+        segments = self.segments
+        pos = self._id_index.get(segment_id)
+        if pos is not None and segments[pos].id == segment_id:
+            return segments[pos]
+
+        # 索引未命中或已过期（段落被原地替换、ID被修改），回退到线性查找
+        for seg in segments:
             if seg.id == segment_id:
+                self._rebuild_index()
                 return seg
         return None
 
@@ -141,6 +202,11 @@ class Document:
         """获取核心论点"""
         return [seg for seg in self.segments if seg.is_core_argument]
 
+    @property
+    def core_argument_count(self) -> int:
+        """核心论点数量（按段落当前的 is_core_argument 实时计数，不构建段落列表）"""
+        return sum(1 for seg in self.segments if seg.is_core_argument)
+
     def to_dict(self) -> Dict:
         """转换为字典"""
         return {
@@ -153,3 +219,42 @@ class Document:
             'metadata': self.metadata,
             'created_at': self.created_at.isoformat()
         }
+
+    def iter_json_chunks(self, dumps: Callable[[object], str] = None) -> Iterator[str]:
+        """
+        逐块生成文档的JSON文本
+
+        与 to_dict 字段一致，但段落与逻辑链逐个序列化（每个占一行），
+        导出时无需先构建整个文档的字典
+
+        Args:
+            dumps: 序列化函数（默认 json.dumps，保留非ASCII字符）
+
+        Returns:
+            JSON文本片段迭代器
+        """
+        if dumps is None:
+            def dumps(obj):
+                return json.dumps(obj, ensure_ascii=False)
+
+        def field_chunk(name: str, value, last: bool = False) -> str:
+            return f'  {dumps(name)}: {dumps(value)}' + ('\n' if last else ',\n')
+
+        def array_chunks(name: str, items: Iterable) -> Iterator[str]:
+            yield f'  {dumps(name)}: ['
+            empty = True
+            for item in items:
+                yield ('\n    ' if empty else ',\n    ') + dumps(item)
+                empty = False
+            yield '],\n' if empty else '\n  ],\n'
+
+        yield '{\n'
+        yield field_chunk('source_file', self.source_file)
+        yield field_chunk('total_duration', self.total_duration)
+        yield field_chunk('segment_count', self.segment_count)
+        yield from array_chunks('segments', (seg.to_dict() for seg in self.segments))
+        yield from array_chunks('logic_chains', (chain.to_dict() for chain in self.logic_chains))
+        yield field_chunk('topic_tree', self.topic_tree)
+        yield field_chunk('metadata', self.metadata)
+        yield field_chunk('created_at', self.created_at.isoformat(), last=True)
+        yield '}\n'
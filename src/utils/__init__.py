@@ -0,0 +1,6 @@
+"""通用工具模块"""
+
+from .event_loop import new_event_loop
+from .jit import njit
+
+__all__ = ['new_event_loop', 'njit']
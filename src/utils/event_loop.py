@@ -0,0 +1,23 @@
+"""
+事件循环工具
+"""
+
+import asyncio
+
+try:
+    import uvloop
+except ImportError:
+    # 可选依赖：未安装时使用标准库事件循环
+    uvloop = None
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    创建新的事件循环
+
+    安装了uvloop时使用其事件循环，降低大量await的调度开销
+
+    Returns:
+        事件循环
+    """
+    return uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
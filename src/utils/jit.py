@@ -0,0 +1,13 @@
+"""
+JIT编译工具
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    # 可选依赖：未安装时按纯Python执行
+    def njit(*args, **kwargs):
+        """numba未安装时的占位装饰器，按纯Python执行"""
+        def decorator(func):
+            return func
+        return decorator